@@ -0,0 +1,46 @@
+"""Benchmarks for the hexformat package.
+
+  The benchmarks are not part of the unit tests. Run them as modules, e.g.::
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.sequential_load
+    python -m benchmarks.reversed_load
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+import time
+
+
+def timeit(func, *args, **kwargs):
+    """Call func once with the given arguments and return (seconds, result)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def randbytes(rng, size):
+    """Return <size> random bytes from the random.Random instance rng. Random.randbytes needs Python 3.9."""
+    if size == 0:
+        return bytes()
+    return rng.getrandbits(8 * size).to_bytes(size, 'little')
@@ -0,0 +1,83 @@
+"""Benchmark loading of Intel-Hex files with the data records in descending address order.
+
+  The same image is loaded once from a file with ascending records and once from a file with the records of every
+  64 KiB segment in reversed order. The descending file is loaded into a default instance, which collects the data
+  records in front of a part and inserts them at once, and into an instance with paged storage (see
+  :meth:`hexformat.multipartbuffer.MultiPartBuffer.usepages`), which uses the head room of the first page. All
+  loads should take about the same time.
+
+  Usage::
+
+    python -m benchmarks.reversed_load [size in MiB, default: 32]
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+import io
+import random
+import sys
+
+from benchmarks import randbytes, timeit
+from hexformat.intelhex import IntelHex
+from hexformat.pagedbuffer import DEFAULT_PAGESIZE
+
+MiB = 1024 * 1024
+SEGMENTSIZE = 0x10000
+
+
+def reversedihex(image):
+    """Return Intel-Hex content of image with the segments and the data records of every segment in descending
+       address order. Every segment starts with its extended linear address record.
+    """
+    start, size = image.range()
+    segments = []
+    for address in range(start, start + size, SEGMENTSIZE):
+        fh = io.StringIO()
+        IntelHex().set(address, image.get(address, SEGMENTSIZE)).toihexfh(fh, variant=32)
+        lines = fh.getvalue().splitlines(True)
+        header = [line for line in lines if line[7:9] == '04']
+        data = [line for line in lines if line[7:9] == '00']
+        segments.append(header + data[::-1])
+    return "".join(line for segment in segments[::-1] for line in segment) + ":00000001FF\n"
+
+
+def main(size=32 * MiB):
+    image = IntelHex().set(0x08000000, randbytes(random.Random(0), size))
+    fh = io.StringIO()
+    image.toihexfh(fh)
+    ascending = fh.getvalue()
+    descending = reversedihex(image)
+    results = []
+    for name, content, pagesize in (('ascending', ascending, None), ('descending', descending, None),
+                                    ('paged', descending, DEFAULT_PAGESIZE)):
+        seconds, inst = timeit(lambda: IntelHex().usepages(pagesize).loadihexfh(io.StringIO(content)))
+        assert inst.parts() == image.parts()
+        assert inst.get(0x08000000, size) == image.get(0x08000000, size)
+        results.append(seconds)
+        print("{:12s} {:6.1f} MiB: {:8.3f} s".format(name, size / MiB, seconds))
+    print("descending / ascending: {:.2f}x".format(results[1] / results[0]))
+    print("paged / ascending:      {:.2f}x".format(results[2] / results[0]))
+
+
+if __name__ == '__main__':
+    main(int(float(sys.argv[1]) * MiB) if len(sys.argv) > 1 else 32 * MiB)
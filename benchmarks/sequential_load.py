@@ -0,0 +1,68 @@
+"""Benchmark loading of sequential hex files with and without the append fast path of MultiPartBuffer.set.
+
+  Usage::
+
+    python -m benchmarks.sequential_load [size in MiB, default: 64]
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+import io
+import sys
+
+from benchmarks import timeit
+from hexformat.intelhex import IntelHex
+from hexformat.srecord import SRecord
+from hexformat.tektronix import TektronixExtHex
+
+MiB = 1024 * 1024
+
+
+def nocursor(cls):
+    """Return subclass of cls which never uses the append fast path of :meth:`set`."""
+    class NoCursor(cls):
+        def set(self, *args, **kwargs):
+            self._cursor = None
+            return super(NoCursor, self).set(*args, **kwargs)
+    NoCursor.__name__ = cls.__name__ + "NoCursor"
+    return NoCursor
+
+
+def main(size=64 * MiB):
+    image = IntelHex()
+    image.set(0x08000000, bytearray(size))
+    for cls, fmt in ((IntelHex, 'ihex'), (SRecord, 'srec'), (TektronixExtHex, 'tek')):
+        fh = io.StringIO()
+        cls.fromother(image, shallow_copy=True).tofh(fh, fmt)
+        content = fh.getvalue()
+        results = []
+        for variant in (nocursor(cls), cls):
+            seconds, inst = timeit(variant.fromfh, io.StringIO(content), fmt)
+            assert inst.parts() == image.parts()
+            results.append(seconds)
+            print("{:24s} {:6.1f} MiB: {:8.3f} s".format(variant.__name__, size / MiB, seconds))
+        print("{:24s} speedup: {:.2f}x".format(cls.__name__, results[0] / results[1]))
+
+
+if __name__ == '__main__':
+    main(int(float(sys.argv[1]) * MiB) if len(sys.argv) > 1 else 64 * MiB)
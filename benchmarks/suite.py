@@ -0,0 +1,233 @@
+"""Benchmark suite for the hex formats and the core MultiPartBuffer operations.
+
+  Every operation is timed on generated workloads of different shape:
+
+    contiguous:     a single part.
+    fragmented:     many small parts separated by small gaps.
+    random-overlap: randomly placed records which partly overlap each other.
+    large-gap:      a few parts separated by gaps much larger than the data.
+
+  For each workload the load and save of all formats and the MultiPartBuffer operations set, get, delete, fill,
+  unfill and copy are timed. The get is timed with a single byte and with a multi-byte FillPattern instance. The
+  latter is filled into every gap, e.g. into thousands of gaps for the fragmented workload.
+
+  The best time of several repetitions is reported. The results can be written as JSON and compared with the results
+  of an earlier run to detect regressions.
+
+  Usage::
+
+    python -m benchmarks.suite [--size MiB] [--repeat N] [--output results.json] [--compare old.json]
+                               [--threshold factor] [--filter text]
+
+  The exit status is 1 if a comparison found a benchmark slower than the given threshold factor or which failed
+  but did not fail in the earlier run. Failing benchmarks are recorded with their error message instead of a time.
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+import argparse
+import datetime
+import io
+import json
+import platform
+import random
+import sys
+
+from benchmarks import randbytes, timeit
+from hexformat import checksum
+from hexformat.fillpattern import FillPattern
+from hexformat.hexdump import HexDump
+from hexformat.intelhex import IntelHex
+from hexformat.multipartbuffer import MultiPartBuffer
+from hexformat.srecord import SRecord
+from hexformat.tektronix import TektronixExtHex
+
+MiB = 1024 * 1024
+BASEADDRESS = 0x08000000
+
+FORMATS = ((IntelHex, 'ihex'), (SRecord, 'srec'), (TektronixExtHex, 'tek'), (HexDump, 'hexdump'))
+
+
+def contiguous(size, rng):
+    """Single part of given size."""
+    return [(BASEADDRESS, randbytes(rng, size))]
+
+
+def fragmented(size, rng, partsize=64, gapsize=16):
+    """Parts of <partsize> bytes separated by gaps of <gapsize> bytes."""
+    data = randbytes(rng, size)
+    return [(BASEADDRESS + pos + (pos // partsize) * gapsize, data[pos:pos + partsize])
+            for pos in range(0, size, partsize)]
+
+
+def randomoverlap(size, rng, minsize=16, maxsize=1024):
+    """Records of random size placed randomly in a range of twice the total size, so that they partly overlap."""
+    records = []
+    total = 0
+    while total < size:
+        length = min(rng.randint(minsize, maxsize), size - total)
+        records.append((BASEADDRESS + rng.randrange(0, 2 * size), randbytes(rng, length)))
+        total += length
+    return records
+
+
+def largegap(size, rng, numparts=4):
+    """<numparts> parts separated by gaps of four times the total data size."""
+    partsize = size // numparts
+    return [(BASEADDRESS + n * (partsize + 4 * size), randbytes(rng, partsize)) for n in range(0, numparts)]
+
+
+WORKLOADS = (('contiguous', contiguous), ('fragmented', fragmented), ('random-overlap', randomoverlap),
+             ('large-gap', largegap))
+
+
+def build(records, cls=MultiPartBuffer):
+    """Return new instance of cls containing all records."""
+    inst = cls()
+    for address, data in records:
+        inst.set(address, data)
+    return inst
+
+
+def best(func, setup=None, repeat=3):
+    """Return the best time of <repeat> calls of func. If setup is given, it is called untimed before every call
+       and its result is passed as only argument to func.
+    """
+    times = []
+    for _ in range(0, repeat):
+        args = () if setup is None else (setup(),)
+        times.append(timeit(func, *args)[0])
+    return min(times)
+
+
+def benchmarks(records):
+    """Yield (name, func, setup) for all benchmarks of a workload."""
+    image = build(records)
+    start, size = image.range()
+
+    yield 'set', lambda: build(records), None
+    yield 'get', lambda: image.get(start, size, 0xFF), None
+    pattern = FillPattern.fromnumber(0xDEADBEEF)
+    yield 'get-pattern', lambda: image.get(start, size, pattern), None
+    yield 'delete', lambda inst: inst.delete(start + size // 4, size // 2), image.copy
+    yield 'fill', lambda inst: inst.fill(fillpattern=0xFF), image.copy
+    yield 'unfill', lambda inst: inst.unfill(unfillpattern=0xFF), lambda: image.copy().fill(fillpattern=0xFF)
+    yield 'copy', image.copy, None
+
+    for cls, fmt in FORMATS:
+        inst = cls.fromother(image, shallow_copy=True)
+        fh = io.StringIO()
+        inst.tofh(fh, fmt)
+        content = fh.getvalue()
+        yield fmt + '.save', lambda inst=inst, fmt=fmt: inst.tofh(io.StringIO(), fmt), None
+        yield fmt + '.load', lambda cls=cls, fmt=fmt, content=content: cls.fromfh(io.StringIO(content), fmt), None
+
+
+def run(size=MiB, repeat=3, namefilter=None, seed=0, log=sys.stdout):
+    """Run all benchmarks and return the results as dictionary suitable for JSON output."""
+    results = []
+    for workloadname, workload in WORKLOADS:
+        records = workload(size, random.Random(seed))
+        for name, func, setup in benchmarks(records):
+            fullname = workloadname + '/' + name
+            if namefilter is not None and namefilter not in fullname:
+                continue
+            result = {'name': fullname, 'workload': workloadname, 'operation': name, 'size': size}
+            try:
+                seconds = best(func, setup, repeat)
+            except Exception as e:
+                result['error'] = "{:s}: {:s}".format(e.__class__.__name__, str(e))
+                if log is not None:
+                    log.write("{:32s} failed with {:s}\n".format(fullname, result['error']))
+            else:
+                result['seconds'] = seconds
+                result['throughput'] = size / seconds / MiB if seconds > 0 else None
+                if log is not None:
+                    log.write("{:32s} {:10.4f} s {:10.1f} MiB/s\n".format(
+                        fullname, seconds, result['throughput'] or float('inf')))
+            results.append(result)
+    return {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'checksum_backend': checksum.backend.name,
+        'size': size,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=1.2, log=sys.stdout):
+    """Compare two result dictionaries. Return list of the names of all benchmarks which are slower by more than
+       the threshold factor or which failed but succeeded in the old results.
+    """
+    oldtimes = {result['name']: result.get('seconds') for result in old['results']}
+    regressions = []
+    for result in new['results']:
+        name = result['name']
+        if name not in oldtimes:
+            continue
+        if 'error' in result:
+            if oldtimes[name] is not None:
+                regressions.append(name)
+                if log is not None:
+                    log.write("{:32s} failed with {:s}  REGRESSION\n".format(name, result['error']))
+            continue
+        if oldtimes[name] is None or oldtimes[name] <= 0:
+            continue
+        ratio = result['seconds'] / oldtimes[name]
+        if ratio > threshold:
+            regressions.append(name)
+        if log is not None:
+            log.write("{:32s} {:10.4f} s -> {:10.4f} s  {:6.2f}x{:s}\n".format(
+                name, oldtimes[name], result['seconds'], ratio, "  REGRESSION" if ratio > threshold else ""))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.split("\n")[0])
+    parser.add_argument('--size', type=float, default=1.0, help="data size of each workload in MiB (default: 1)")
+    parser.add_argument('--repeat', type=int, default=3, help="number of repetitions, best time is used")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the workload generators")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="compare results with this earlier JSON result file")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown factor reported as regression")
+    parser.add_argument('--filter', help="only run benchmarks which name contains this text")
+    args = parser.parse_args(argv)
+
+    results = run(int(args.size * MiB), args.repeat, args.filter, args.seed)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as fh:
+            old = json.load(fh)
+        if compare(old, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,9 +22,143 @@
     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
-import copy
+import collections
+import concurrent.futures
+import io
+import os
 
-from hexformat.multipartbuffer import MultiPartBuffer
+from hexformat.multipartbuffer import MultiPartBuffer, mergeparts
+
+# Number of characters read at once by the decoders
+DECODE_CHUNKSIZE = 1 << 20
+# Minimal size in bytes of the file chunks decoded by one worker process when loading in parallel
+PARALLEL_CHUNKSIZE = 1 << 24
+# Number of file chunks per worker process when loading in parallel
+PARALLEL_CHUNKSPERWORKER = 4
+# Size in bytes of the data slices encoded by one task when saving in parallel
+PARALLEL_ENCODESIZE = 1 << 20
+
+
+def readlineblocks(fh, chunksize=DECODE_CHUNKSIZE):
+    """Yield lists of lines read from given file handle in blocks of about chunksize characters.
+
+       The lines are yielded without the terminating newline character. File handles without read() method are read
+       using readline() and one line per list is yielded instead.
+
+       Args:
+         fh (file handle or compatible): Source of lines. Must be opened in text mode.
+         chunksize (int): Number of characters to be read at once.
+    """
+    read = getattr(fh, 'read', None)
+    if read is None:
+        line = fh.readline()
+        while line != '':
+            yield [line.rstrip("\n")]
+            line = fh.readline()
+        return
+    rest = ''
+    block = read(chunksize)
+    while block != '':
+        lines = (rest + block).split("\n")
+        rest = lines.pop()
+        yield lines
+        block = read(chunksize)
+    if rest != '':
+        yield [rest]
+
+
+def filechunks(filename, numchunks, minsize=None):
+    """Split named file at line boundaries into at most <numchunks> byte ranges.
+
+       Args:
+         filename (str): Name of file.
+         numchunks (int): Maximal number of chunks.
+         minsize (None or int): Minimal size of a chunk in bytes. If None PARALLEL_CHUNKSIZE is used.
+
+       Returns:
+         List of (start, stop) byte positions. Every chunk except the first starts after a newline character.
+    """
+    if minsize is None:
+        minsize = PARALLEL_CHUNKSIZE
+    size = os.path.getsize(filename)
+    chunksize = max(1, minsize, -(-size // max(1, numchunks)))
+    starts = [0]
+    with open(filename, "rb") as fh:
+        pos = chunksize
+        while pos < size:
+            fh.seek(pos)
+            fh.readline()
+            pos = fh.tell()
+            if pos >= size:
+                break
+            starts.append(pos)
+            pos += chunksize
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def readchunk(filename, start, stop):
+    """Return text file handle of the byte range start:stop of the named file, decoded like open(filename, "r")."""
+    with open(filename, "rb") as fh:
+        fh.seek(start)
+        raw = fh.read(stop - start)
+    return io.TextIOWrapper(io.BytesIO(raw))
+
+
+def loadchunk(template, method, filename, start, stop, args):
+    """Load byte range of named file into a new instance. Used as worker function by :meth:`HexFormat._loadparallel`.
+
+       Args:
+         template (class or instance): Class of the new instance or an empty instance which is used directly.
+         method (str): Name of the method which is called with the line blocks of the range and <args>.
+                       It must return True if the end of the data was reached, e.g. by an end of file record.
+         filename (str): Name of file.
+         start (int): Start position of range in bytes.
+         stop (int): End position of range in bytes.
+         args (tuple): Further arguments of the method.
+
+       Returns:
+         Tuple (instance, end reached, exception or None). If loading raises an exception the instance contains
+         the data loaded before the exception.
+    """
+    self = template() if isinstance(template, type) else template
+    try:
+        end = getattr(self, method)(readlineblocks(readchunk(filename, start, stop)), *args)
+    except Exception as e:
+        return self, True, e
+    return self, bool(end), None
+
+
+def partslices(parts, slicesize, recordsize=1):
+    """Yield (address, data) tuples of the parts split into slices of whole records.
+
+       Args:
+         parts (iterable): (address, buffer) tuples, e.g. the part list of an instance.
+         slicesize (int): Maximal size of a slice in bytes. Rounded down to a multiple of <recordsize>, but at
+                          least one record.
+         recordsize (int): Number of data bytes per record.
+    """
+    slicesize = max(1, slicesize // recordsize) * recordsize
+    for address, buffer in parts:
+        for pos in range(0, len(buffer), slicesize):
+            yield address + pos, buffer[pos:pos + slicesize]
+
+
+def encodechunk(template, method, args):
+    """Encode data to text. Used as worker function by :meth:`HexFormat._saveparallel`.
+
+       Args:
+         template (class or instance): Class of the instance which method is called or the instance itself.
+         method (str): Name of the method which is called with a text file handle and <args> and writes the
+                       encoded lines to it.
+         args (tuple): Further arguments of the method.
+
+       Returns:
+         Tuple (encoded text, return value of the method).
+    """
+    self = template() if isinstance(template, type) else template
+    fh = io.StringIO()
+    result = getattr(self, method)(fh, *args)
+    return fh.getvalue(), result
 
 
 class HexformatError(Exception):
@@ -52,14 +186,133 @@ class HexFormat(MultiPartBuffer):
     def fromother(cls, other, shallow_copy=False):
         self = cls()
         if isinstance(other, MultiPartBuffer):
+            self._pagesize = other._pagesize
             if shallow_copy:
+                # Both instances share the part list and its index, which are therefore only modified in place
                 self._parts = other._parts
+                self._starts = other._starts
             else:
-                self._parts = copy.deepcopy(other._parts)
+                self._parts = other._copyparts()
+                self._shared = set(other._shared)
+                self._reindex()
         else:
             raise TypeError
         return self
 
+    def _loadparallel(self, filename, workers, method, args=(), scanner=None, state=(), combine=None,
+                      overwrite_data=True, overwrite_metadata=False, template=None):
+        """Load named file by decoding chunks of it in parallel worker processes.
+
+           The file is split at line boundaries by :func:`filechunks` and every chunk is loaded into a new instance
+           by :func:`loadchunk`. The part lists of all instances are then merged into this one in a single sweep,
+           with the data of later chunks overwriting the data of earlier ones like sequential loading does, or
+           the other way round if <overwrite_data> is False. The metadata is taken over by :meth:`_mergemetadata`.
+           Chunks after one which reached the end of the data or raised an exception are ignored, and the exception
+           is raised after the data before it was merged.
+
+           Args:
+             filename (str): Name of file.
+             workers (int): Number of worker processes.
+             method (str): Name of the method which loads line blocks, see :func:`loadchunk`.
+             args (tuple): Arguments of the method.
+             scanner (None or callable): Called as scanner(filename, start, stop) in the worker processes to find
+                                         the decoder state at the end of every chunk. Must return a tuple or None if
+                                         the chunk does not change the state.
+             state (tuple): Decoder state at the start of the file. The state of every chunk is passed as further
+                            arguments of the method after <args>.
+             combine (None or callable): Called as combine(state, scan result) to get the state at the start of
+                                         the next chunk. By default the scan result replaces the state if not None.
+             overwrite_data (bool): If True the data of later chunks overwrites existing data, otherwise the
+                                    existing data is kept where parts overlap.
+             overwrite_metadata (bool): Passed to :meth:`_mergemetadata`.
+             template (None or instance): Empty instance copied for every chunk, e.g. to start with the metadata of
+                                          this instance. If None new instances of the class are used.
+
+           Returns:
+             self
+        """
+        if template is None:
+            template = self.__class__
+        chunks = filechunks(filename, workers * PARALLEL_CHUNKSPERWORKER)
+        if len(chunks) == 1:
+            results = [loadchunk(template, method, filename, 0, chunks[0][1], tuple(args) + tuple(state))]
+        else:
+            results = []
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                states = [tuple(state)]
+                if scanner is not None:
+                    starts, stops = zip(*chunks[:-1])
+                    for scanned in executor.map(scanner, [filename] * len(starts), starts, stops):
+                        if combine is not None:
+                            states.append(tuple(combine(states[-1], scanned)))
+                        else:
+                            states.append(states[-1] if scanned is None else tuple(scanned))
+                else:
+                    states *= len(chunks)
+                futures = [executor.submit(loadchunk, template, method, filename, start, stop,
+                                           tuple(args) + chunkstate)
+                           for (start, stop), chunkstate in zip(chunks, states)]
+                for future in futures:
+                    results.append(future.result())
+                    if results[-1][1]:
+                        break
+                for future in futures:
+                    future.cancel()
+        newbuffer = None if self._pagesize is None else self._newbuffer
+        partlists = [self._parts] + [image._parts for image, end, error in results]
+        if overwrite_data:
+            self._parts[:] = mergeparts(partlists, owned=0, newbuffer=newbuffer)
+        else:
+            self._parts[:] = mergeparts(partlists[::-1], owned=len(partlists) - 1, newbuffer=newbuffer)
+        self._reindex()
+        self._cursor = None
+        for image, end, error in results:
+            self._mergemetadata(image, overwrite_metadata)
+        error = results[-1][2]
+        if error is not None:
+            raise error
+        return self
+
+    def _saveparallel(self, fh, workers, method, tasks):
+        """Encode data in parallel worker processes and write the results in order to the given file handle.
+
+           Every task is encoded by :func:`encodechunk` in a worker process. At most PARALLEL_CHUNKSPERWORKER tasks
+           per worker are pending at once to limit the amount of data and text held in memory. If a task raises
+           an exception the text of all tasks before it is written and the exception is raised.
+
+           Args:
+             fh (file handle or compatible): Destination of the encoded text.
+             workers (int): Number of worker processes.
+             method (str): Name of the method which encodes a task, see :func:`encodechunk`.
+             tasks (iterable): Argument tuples of the method, one per task.
+
+           Returns:
+             List of the return values of the method for all tasks, in order.
+        """
+        results = []
+        pending = collections.deque()
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                for args in tasks:
+                    pending.append(executor.submit(encodechunk, self.__class__, method, tuple(args)))
+                    if len(pending) >= workers * PARALLEL_CHUNKSPERWORKER:
+                        text, result = pending.popleft().result()
+                        fh.write(text)
+                        results.append(result)
+                while pending:
+                    text, result = pending.popleft().result()
+                    fh.write(text)
+                    results.append(result)
+            finally:
+                for future in pending:
+                    future.cancel()
+        return results
+
+    def _mergemetadata(self, other, overwrite_metadata=False):
+        """Take over the metadata of an instance loaded from a later part of the same file. Overwritten by the
+           subclasses which support parallel loading."""
+        pass
+
     def settings(self, **settings):
         for name, value in settings.items():
             if name in self._SETTINGS:
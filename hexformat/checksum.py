@@ -0,0 +1,190 @@
+""" Provide checksum backends shared by the hex format codecs.
+
+  The checksums of all supported formats are built from byte sums or from the sum of hex digit values (nibbles).
+  The functions of this module compute these sums for a whole batch of records at once using the selected backend.
+  If NumPy is installed the :class:`NumpyChecksums` backend is selected by default, otherwise the pure Python
+  :class:`PythonChecksums` backend is used. Another backend can be selected with :func:`setbackend`.
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PythonChecksums(object):
+    """Pure Python checksum backend."""
+    name = 'python'
+
+    @staticmethod
+    def bytesums(data, starts):
+        """Return list with the byte sum of every record.
+
+           Args:
+             data (Buffer): Content of all records.
+             starts (sequence of int): Ascending start index of every record in data. Each record ends at the start
+                                       of the next one, the last record at the end of data.
+        """
+        ends = list(starts[1:])
+        ends.append(len(data))
+        return [sum(data[start:end]) for start, end in zip(starts, ends)]
+
+    @staticmethod
+    def blocksums(data, blocksize):
+        """Return list with the byte sum of every block of <blocksize> bytes. The last block may be shorter."""
+        return [sum(data[pos:pos + blocksize]) for pos in range(0, len(data), blocksize)]
+
+    @staticmethod
+    def nibbleblocksums(data, blocksize):
+        """Return list with the sum of all nibbles (hex digit values) of every block of <blocksize> bytes.
+           The last block may be shorter.
+        """
+        return [sum((byte >> 4) + (byte & 0x0F) for byte in data[pos:pos + blocksize])
+                for pos in range(0, len(data), blocksize)]
+
+    @staticmethod
+    def hexdigitsum(string):
+        """Return sum of the values of all hex digits in string.
+
+           Raises:
+             ValueError: if string contains non-hex characters.
+        """
+        checksum = 0
+        for char in string:
+            checksum += int(char, 16)
+        return checksum
+
+
+class NumpyChecksums(PythonChecksums):
+    """NumPy checksum backend. Sums all records of a batch using array reductions."""
+    name = 'numpy'
+    _hexdigitvalues = None  # Lookup table with the value of every hex digit character, -1 for other characters
+
+    @staticmethod
+    def _array(data):
+        try:
+            return numpy.frombuffer(data, dtype=numpy.uint8)
+        except TypeError:
+            return numpy.frombuffer(bytes(data), dtype=numpy.uint8)
+
+    @classmethod
+    def bytesums(cls, data, starts):
+        if len(starts) == 0:
+            return []
+        starts = numpy.asarray(starts, dtype=numpy.intp)
+        ends = numpy.append(starts[1:], len(data))
+        # reduceat returns a single element instead of zero for empty records and rejects a start at the end of data
+        nonempty = starts < ends
+        sums = numpy.zeros(len(starts), dtype=numpy.uint64)
+        if nonempty.any():
+            sums[nonempty] = numpy.add.reduceat(cls._array(data), starts[nonempty], dtype=numpy.uint64)
+        return sums.tolist()
+
+    @classmethod
+    def blocksums(cls, data, blocksize):
+        return cls._blocksums(cls._array(data), blocksize)
+
+    @classmethod
+    def hexdigitsum(cls, string):
+        try:
+            array = numpy.frombuffer(string.encode('ascii'), dtype=numpy.uint8)
+        except UnicodeEncodeError:
+            # int() also accepts non-ASCII digits
+            return PythonChecksums.hexdigitsum(string)
+        if cls._hexdigitvalues is None:
+            values = numpy.full(256, -1, dtype=numpy.int16)
+            for char in '0123456789abcdefABCDEF':
+                values[ord(char)] = int(char, 16)
+            NumpyChecksums._hexdigitvalues = values
+        values = cls._hexdigitvalues[array]
+        if (values < 0).any():
+            raise ValueError("invalid hex digit in '{:s}'".format(string))
+        return int(values.sum())
+
+    @classmethod
+    def nibbleblocksums(cls, data, blocksize):
+        array = cls._array(data)
+        return cls._blocksums((array >> 4) + (array & 0x0F), blocksize)
+
+    @staticmethod
+    def _blocksums(array, blocksize):
+        """Sum the full blocks of the array as reshaped 2D array and add the sum of the remaining shorter block."""
+        numblocks = len(array) // blocksize
+        sums = array[0:numblocks * blocksize].reshape(numblocks, blocksize).sum(axis=1, dtype=numpy.uint64).tolist()
+        if len(array) > numblocks * blocksize:
+            sums.append(int(array[numblocks * blocksize:].sum(dtype=numpy.uint64)))
+        return sums
+
+
+BACKENDS = {PythonChecksums.name: PythonChecksums}
+if numpy is not None:
+    BACKENDS[NumpyChecksums.name] = NumpyChecksums
+    backend = NumpyChecksums
+else:
+    backend = PythonChecksums
+
+
+def setbackend(name_or_backend):
+    """Select checksum backend used by all codecs.
+
+       Args:
+         name_or_backend (str or class): Name of backend as listed in BACKENDS or a backend class which provides
+                                         the same methods as :class:`PythonChecksums`.
+
+       Returns:
+         Previously selected backend.
+
+       Raises:
+         ValueError: if backend name is unknown, e.g. 'numpy' if NumPy is not installed.
+    """
+    global backend
+    previous = backend
+    if isinstance(name_or_backend, str):
+        try:
+            name_or_backend = BACKENDS[name_or_backend]
+        except KeyError:
+            raise ValueError("Unknown or unavailable checksum backend '{:s}'".format(name_or_backend))
+    backend = name_or_backend
+    return previous
+
+
+def bytesums(data, starts):
+    """Return list with the byte sum of every record of data. See :meth:`PythonChecksums.bytesums`."""
+    return backend.bytesums(data, starts)
+
+
+def blocksums(data, blocksize):
+    """Return list with the byte sum of every block of data. See :meth:`PythonChecksums.blocksums`."""
+    return backend.blocksums(data, blocksize)
+
+
+def nibbleblocksums(data, blocksize):
+    """Return list with the nibble sum of every block of data. See :meth:`PythonChecksums.nibbleblocksums`."""
+    return backend.nibbleblocksums(data, blocksize)
+
+
+def hexdigitsum(string):
+    """Return sum of the values of all hex digits in string. See :meth:`PythonChecksums.hexdigitsum`."""
+    return backend.hexdigitsum(string)
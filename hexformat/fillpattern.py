@@ -23,9 +23,10 @@
 
 """
 
-import copy
+import collections
 import random
 import sys
+import threading
 
 if sys.version_info < (3,):
     # noinspection PyUnresolvedReferences
@@ -56,13 +57,73 @@ except AttributeError:
         return databytes
 
 
+FILLCACHE_ENTRIES = 8  # Maximal number of patterns for which generated fill data is cached
+FILLCACHE_MAXSIZE = 1 << 24  # Maximal total size of cached fill data in bytes
+RANDOM_BLOCKSIZE = 4096  # Size of the independently seeded blocks of seeded RandomContent
+
+_fillcache = collections.OrderedDict()
+_fillcachelock = threading.Lock()
+
+
+def repeatpattern(pattern, size):
+    """Return read-only memoryview of at least <size> bytes consisting of the repeated pattern.
+
+       The generated data of the most recently used patterns is kept in a least-recently-used cache of at most
+       FILLCACHE_ENTRIES patterns and FILLCACHE_MAXSIZE bytes in total. A request which is covered by the cached
+       data of the same pattern returns a view of it without generating the data again.
+
+       Args:
+         pattern (bytes or bytearray): Non-empty pattern to be repeated.
+         size (int): Minimal size of returned data.
+
+       Returns:
+         Read-only memoryview which length is a multiple of the pattern length.
+    """
+    pattern = bytes(pattern)
+    with _fillcachelock:
+        data = _fillcache.get(pattern)
+        if data is not None:
+            _fillcache.pop(pattern)
+            _fillcache[pattern] = data
+            if len(data) >= size:
+                return memoryview(data)
+    data = pattern * -(-size // len(pattern))
+    if len(data) <= FILLCACHE_MAXSIZE:
+        with _fillcachelock:
+            _fillcache.pop(pattern, None)
+            _fillcache[pattern] = data
+            cachesize = sum(len(cached) for cached in _fillcache.values())
+            while len(_fillcache) > FILLCACHE_ENTRIES or cachesize > FILLCACHE_MAXSIZE:
+                oldpattern, olddata = _fillcache.popitem(last=False)
+                cachesize -= len(olddata)
+    return memoryview(data)
+
+
+def randombytes(size, rng=random):
+    """Return <size> random bytes generated at once by the given random number generator.
+
+       Args:
+         size (int): Number of bytes.
+         rng (random.Random or module random): Random number generator. The module level generator by default.
+
+       Returns:
+         Bytes (or bytearray) of given size. For the same generator state the result is equal for all Python versions.
+    """
+    if size <= 0:
+        return b''
+    try:
+        return rng.randbytes(size)
+    except AttributeError:  # Python < 3.9; randbytes() is implemented the same way
+        return int_to_bytes(rng.getrandbits(size * 8), size, 'little')
+
+
 class FillPattern(object):
     """General fill pattern class which instances contain a underlying pattern with is automatically repeated if \
        required.
 
-        The underlying pattern is a bytearray which is repeated on demand to fit into a given official length or a slice
-        of any length. An internal start offset for the underlying pattern is used when an instance is produced as slice
-        with a non-zero start offset.
+        The underlying pattern is an immutable bytes object which is repeated on demand to fit into a given official
+        length or a slice of any length. An internal start offset for the underlying pattern is used when an instance
+        is produced as slice with a non-zero start offset. Slices and copies share the pattern object.
        
         Args:
           pattern (byte or iterable of bytes):  The basic fill pattern which will be repeated.
@@ -75,13 +136,15 @@ class FillPattern(object):
           ValueError: if pattern argument is numeric but outside of the byte range of 0..255.     
     """
 
+    __slots__ = ('_pattern', '_length', '_offset')
+
     def __init__(self, pattern=0xFF, length=None):
         if isinstance(pattern, integer_types):
             if pattern < 0x100:
                 pattern = [pattern, ]
             else:
                 raise ValueError("numeric pattern must be a single byte (0..255)")
-        self._pattern = bytearray(pattern)
+        self._pattern = bytes(bytearray(pattern))
         if length is None:
             length = len(self._pattern)
         self._length = length
@@ -144,6 +207,10 @@ class FillPattern(object):
         """
         self._length = int(length)
 
+    def iszero(self):
+        """Return True if the pattern only produces zero bytes."""
+        return not any(self._pattern)
+
     def __mul__(self, m):
         """Return copy of itself with an official length scaled by the given integer.
         
@@ -174,6 +241,26 @@ class FillPattern(object):
         self._length *= int(m)
         return self
 
+    def tobytes(self, offset=0, length=None):
+        """Return the content from official index <offset> for <length> bytes as bytearray.
+
+           The content is copied from the repeated pattern returned by :func:`repeatpattern`, i.e. it is generated
+           at once instead of byte by byte and recently used patterns are served from a cache.
+
+           Args:
+             offset (int): Official index of first byte.
+             length (None or int): Number of bytes. If None the bytes up to the official length are returned.
+
+           Returns:
+             New bytearray with the content.
+        """
+        offset = int(offset)
+        if length is None:
+            length = self._length - offset
+        length = max(0, int(length))
+        start = (self._offset + offset) % len(self._pattern)
+        return bytearray(repeatpattern(self._pattern, start + length)[start:start + length])
+
     def __iter__(self):
         """Yields every element over official length."""
         plen = len(self._pattern)
@@ -188,7 +275,7 @@ class FillPattern(object):
             n = (self._offset + int(i)) % len(self._pattern)
             return self._pattern[n]
         except TypeError:
-            other = copy.deepcopy(self)
+            other = self.__copy__()
             start = i.start
             stop = i.stop
             if i.step is not None:
@@ -203,29 +290,68 @@ class FillPattern(object):
                 stop = self._length + stop
             other._offset += start
             other._length = stop - start
-            plen = len(self._pattern)
-            if other._offset > plen:
-                other._offset %= plen
+            other._offset = other._wrapoffset(other._offset)
             return other
 
+    def __copy__(self):
+        """Return copy sharing the pattern."""
+        other = self.__class__.__new__(self.__class__)
+        other._pattern = self._pattern
+        other._length = self._length
+        other._offset = self._offset
+        return other
+
+    def __deepcopy__(self, memo):
+        """Return copy sharing the pattern, as the pattern is immutable."""
+        return self.__copy__()
+
+    def _wrapoffset(self, offset):
+        """Return offset reduced to the pattern length."""
+        plen = len(self._pattern)
+        if offset > plen:
+            offset %= plen
+        return offset
+
 
 class RandomContent(FillPattern):
     """Specific FillPattern subclass to produce random content. 
     
         Return random content instead any given pattern.
         Every call produces a different random content. 
-        For this the Python :meth:`random.randint` method is used.
+        For this the Python :meth:`random.randint` method is used, or :func:`randombytes` for bulk content.
+
+        If a seed is given the content is reproducible instead: every byte only depends on the seed and its
+        index. Each block of RANDOM_BLOCKSIZE bytes is generated by its own :class:`random.Random` instance
+        seeded with the seed and the block number, so any range can be generated without the preceding content.
 
         Args:
             length (int): Official length. Only used if used with len() etc.
+            seed (None, int, str or bytes): Seed for reproducible content. If None the content is not reproducible.
 
         Raises:
             AttributeError: May be raised by len(pattern) if input is not as requested above.     
     """
 
-    def __init__(self, length=1):
+    __slots__ = ('_seed',)
+
+    def __init__(self, length=1, seed=None):
         pattern = [0, ]
         super(RandomContent, self).__init__(pattern, length)
+        self._seed = seed
+
+    def __copy__(self):
+        """Return copy with the same seed."""
+        other = super(RandomContent, self).__copy__()
+        other._seed = self._seed
+        return other
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def iszero(self):
+        """Return False as random content is never all zero."""
+        return False
 
     def __mul__(self, factor):
         """Return new instance with length scaled by factor.
@@ -241,15 +367,55 @@ class RandomContent(FillPattern):
         """
         if not isinstance(factor, integer_types) or factor <= 0:
             raise ValueError("can't multiply instance by non-int or non-positive integer")
-        return self.__class__(self._length * int(factor))
+        return self.__class__(self._length * int(factor), self._seed)
+
+    def _wrapoffset(self, offset):
+        """Return offset unchanged as seeded content does not repeat."""
+        return offset
+
+    def _randomblock(self, index):
+        """Return seeded random content of block with given index."""
+        rng = random.Random("{!r}:{:d}".format(self._seed, index))
+        return randombytes(RANDOM_BLOCKSIZE, rng)
+
+    def tobytes(self, offset=0, length=None):
+        """Return <length> random bytes (default: official length minus offset) as bytearray.
+
+           The bytes are generated at once by :func:`randombytes`. If the instance is seeded, the bytes are taken
+           from the seeded blocks covering the official range offset:offset+length.
+        """
+        offset = int(offset)
+        if length is None:
+            length = self._length - offset
+        length = max(0, int(length))
+        if self._seed is None:
+            return bytearray(randombytes(length))
+        start = self._offset + offset
+        first = start // RANDOM_BLOCKSIZE
+        last = (start + length - 1) // RANDOM_BLOCKSIZE
+        data = bytearray().join(self._randomblock(index) for index in range(first, last + 1))
+        skip = start - first * RANDOM_BLOCKSIZE
+        del data[skip + length:]
+        del data[0:skip]
+        return data
 
     def __iter__(self):
         """Yield random byte values. The number of bytes is the official length of the instance."""
+        if self._seed is not None:
+            for pos in range(0, self._length, RANDOM_BLOCKSIZE):
+                for byte in self.tobytes(pos, min(RANDOM_BLOCKSIZE, self._length - pos)):
+                    yield byte
+            return
         for n in range(0, self._length):
             yield random.randint(0, 255)
 
     def __getitem__(self, i):
-        """Return random byte value independent from input value."""
+        """Return random byte value independent from input value, or the seeded byte at the given index."""
         if isinstance(i, slice):
             return super(RandomContent, self).__getitem__(i)
+        if self._seed is not None:
+            i = int(i)
+            if i < 0:
+                i += self._length
+            return self.tobytes(i, 1)[0]
         return random.randint(0, 255)
@@ -31,7 +31,11 @@
 
 """
 
-from hexformat.base import DecodeError, EncodeError, HexFormat
+import binascii
+import re
+
+from hexformat import checksum
+from hexformat.base import DecodeError, EncodeError, HexFormat, partslices, readlineblocks
 
 # Intel-Hex Record Types
 RT_DATA = 0
@@ -41,6 +45,33 @@ RT_START_SEGMENT_ADDRESS = 3
 RT_EXTENDED_LINEAR_ADDRESS = 4
 RT_START_LINEAR_ADDRESS = 5
 
+# Number of data bytes encoded at once by the Intel-Hex encoder
+ENCODE_CHUNKSIZE = 1 << 20
+
+# Extended segment (02) and extended linear (04) address records. Not anchored to the line start, so that the
+# search can skip quickly to the start codes.
+_ADDRESSRECORD = re.compile(br':02[0-9A-Fa-f]{4}0([24])([0-9A-Fa-f]{4})')
+
+
+def _scanihexchunk(filename, start, stop):
+    """Return the address state (highaddr, segmaddr) set by the last extended address record in the byte range
+       start:stop of the named file, or None if there is no such record. Used to pre-scan the chunks of a file
+       loaded in parallel, see :meth:`IntelHex.loadihexfile`.
+    """
+    with open(filename, "rb") as fh:
+        fh.seek(start)
+        raw = fh.read(stop - start)
+    match = None
+    for found in _ADDRESSRECORD.finditer(raw):
+        if found.start() == 0 or raw[found.start() - 1] in b'\r\n':
+            match = found
+    if match is None:
+        return None
+    value = int(match.group(2), 16)
+    if match.group(1) == b'4':
+        return value << 16, None
+    return None, value << 4
+
 
 class IntelHex(HexFormat):
     """`Intel-Hex`_ file representation class.
@@ -185,10 +216,26 @@ class IntelHex(HexFormat):
             databytes = bytearray.fromhex(line[1:])
         except:
             raise ValueError
+        return self._decodeihexrecord(databytes, (sum(databytes) & 0xFF) == 0x00)
+
+    def _decodeihexrecord(self, databytes, checksumcorrect):
+        """Decode the bytes of a single Intel-Hex record and return decoded parts as tuple.
+
+           Args:
+             databytes (Buffer): Record content without start code, i.e. byte count till checksum.
+             checksumcorrect (bool): Result of the checksum verification of the record.
+
+           Returns:
+             Tuple (recordtype, address, data, bytecount, crccorrect) with types (int, int, Buffer, int, bool).
+
+           Raises:
+             DecodeError: on data length - byte count mismatch.
+             DecodeError: on unknown record type.
+             DecodeError: on data length - record type mismatch.
+        """
         bytecount = databytes[0]
         if bytecount != len(databytes) - 5:
             raise DecodeError("Data length does not match byte count.")
-        checksumcorrect = ((sum(databytes) & 0xFF) == 0x00)
         address = (databytes[1] << 8) | databytes[2]
         recordtype = databytes[3]
         try:
@@ -200,6 +247,40 @@ class IntelHex(HexFormat):
         data = databytes[4:-1]
         return recordtype, address, data, bytecount, checksumcorrect
 
+    def _parseihexlines(self, lines):
+        """Parse a block of Intel-Hex lines and yield the decoded parts of every line as tuple.
+
+           The hex digits of all lines are decoded together and the checksums of all records are verified as batch
+           using :func:`hexformat.checksum.bytesums`. If decoding fails, e.g. because of a misformatted line,
+           the lines are parsed one by one using :meth:`_parseihexline` instead, so that errors are raised at the
+           same line as before.
+
+           Args:
+             lines (list of str): Input lines, usually without line termination character(s).
+
+           Yields:
+             Tuple (recordtype, address, data, bytecount, crccorrect) with types (int, int, Buffer, int, bool).
+        """
+        try:
+            payloads = [line.rstrip("\r\n") for line in lines]
+            for payload in payloads:
+                if payload[0] != ":" or not (len(payload) & 1):
+                    raise ValueError
+            databytes = binascii.unhexlify("".join([payload[1:] for payload in payloads]))
+        except (ValueError, IndexError, TypeError):
+            for line in lines:
+                yield self._parseihexline(line)
+            return
+        starts = []
+        end = 0
+        for payload in payloads:
+            starts.append(end)
+            end += len(payload) >> 1
+        starts.append(end)
+        decode = self._decodeihexrecord
+        for n, recordsum in enumerate(checksum.bytesums(databytes, starts[:-1])):
+            yield decode(databytes[starts[n]:starts[n + 1]], (recordsum & 0xFF) == 0x00)
+
     def _encodeihexline(self, recordtype, address16bit, data):
         """Encode given data to Intel-Hex format.
 
@@ -237,19 +318,23 @@ class IntelHex(HexFormat):
         return linetempl.format(bytecount, address16bit, recordtype, datastr, checksum)
 
     @classmethod
-    def fromihexfile(cls, filename, ignore_checksum_errors=False):
+    def fromihexfile(cls, filename, ignore_checksum_errors=False, workers=None):
         """Generates IntelHex instance from Intel-Hex file.
 
-           Opens filename for reading and calls :meth:`fromihexfh` with the file handle.
+           Opens filename for reading and calls :meth:`fromihexfh` with the file handle. If <workers> is larger
+           than 1 the file is loaded in parallel instead, see :meth:`loadihexfile`.
 
            Args:
              filename (str): input filename
              ignore_checksum_errors (bool): If True no error is raised on checksum failures
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              New instance of class with loaded data.
 
         """
+        if workers is not None and workers > 1:
+            return cls().loadihexfile(filename, ignore_checksum_errors, workers)
         with open(filename, "r") as fh:
             return cls.fromihexfh(fh, ignore_checksum_errors)
 
@@ -270,24 +355,36 @@ class IntelHex(HexFormat):
         self.loadihexfh(fh, ignore_checksum_errors)
         return self
 
-    def loadihexfile(self, filename, ignore_checksum_errors=False):
+    def loadihexfile(self, filename, ignore_checksum_errors=False, workers=None):
         """Loads Intel-Hex lines from named file.
 
-           Creates new instance and calls :meth:`loadihexfh` on it.
+           Opens filename for reading and calls :meth:`loadihexfh` with the file handle.
+
+           If <workers> is larger than 1 the file is split at line boundaries into chunks which are decoded in
+           parallel by that many worker processes, see :meth:`_loadparallel`. Every chunk is pre-scanned for its
+           last extended address record, so that each worker knows the upper address bits valid at the start of
+           its chunk. The result is the same as from sequential loading.
 
            Args:
              filename (str): Name of Intel-Hex file.
              ignore_checksum_errors (bool): If True no error is raised on checksum failures.
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              self
         """
+        if workers is not None and workers > 1:
+            return self._loadparallel(filename, workers, '_loadihexblocks', (ignore_checksum_errors,),
+                                      _scanihexchunk, (0, None))
         with open(filename, "r") as fh:
             return self.loadihexfh(fh, ignore_checksum_errors)
 
     def loadihexfh(self, fh, ignore_checksum_errors=False):
         """Loads Intel-Hex lines from file handle.
 
+           The file handle is read in large blocks which are decoded at once, see :meth:`_parseihexlines`.
+           Therefore the file handle position after the end of file record is undefined.
+
            Args:
              fh (file handle or compatible): Source of Intel-Hex lines.
              ignore_checksum_errors (bool): If True no error is raised on checksum failures.
@@ -299,52 +396,75 @@ class IntelHex(HexFormat):
              DecodeError: on checksum mismatch if ignore_checksum_errors is False.
              DecodeError: on unsupported record type.
         """
-        highaddr = 0
-        segmaddr = None
-        line = fh.readline()
-        while line != '':
-            (recordtype, lowaddress, data, datasize, checksumcorrect) = self._parseihexline(line)
-            if not checksumcorrect and not ignore_checksum_errors:
-                raise DecodeError("Checksum mismatch.")
-            if recordtype == 0:
-                if highaddr is not None:
-                    self.set((highaddr + lowaddress), data, datasize)
-                else:
-                    if (lowaddress + datasize) <= 0x10000:
-                        self.set((segmaddr + lowaddress), data, datasize)
-                    else:  # wrap on segment boundary:
-                        fit = 0x10000 - lowaddress
-                        self.set((segmaddr + lowaddress), data, fit)
-                        self.set(segmaddr, data[fit:])
-
-                if self._bytesperline is None:
-                    self._bytesperline = datasize
-            elif recordtype == 1:
-                # End of file
-                return self
-            elif recordtype == 2:
-                segmaddr = (data[0] << 12) | (data[1] << 4)
-                highaddr = None
-                if self._variant is None:
-                    self._variant = 16
-            elif recordtype == 3:
-                self._cs_ip = (data[0] << 24) | (data[1] << 16) | (data[2] << 8) | data[3]
-                if self._variant is None:
-                    self._variant = 16
-            elif recordtype == 4:
-                highaddr = (data[0] << 24) | (data[1] << 16)
-                segmaddr = None
-                if self._variant is None:
-                    self._variant = 32
-            elif recordtype == 5:
-                self._eip = (data[0] << 24) | (data[1] << 16) | (data[2] << 8) | data[3]
-                if self._variant is None:
-                    self._variant = 32
-            else:
-                raise DecodeError("Unsupported record type.")
-            line = fh.readline()
+        self._loadihexblocks(readlineblocks(fh), ignore_checksum_errors)
         return self
 
+    def _loadihexblocks(self, blocks, ignore_checksum_errors=False, highaddr=0, segmaddr=None):
+        """Load blocks of Intel-Hex lines as yielded by :func:`hexformat.base.readlineblocks`.
+
+           Args:
+             blocks (iterable): Lists of Intel-Hex lines.
+             ignore_checksum_errors (bool): If True no error is raised on checksum failures.
+             highaddr (None or int): Upper address bits set by the last extended linear address record.
+             segmaddr (None or int): Segment address set by the last extended segment address record. Only used if
+                                     highaddr is None.
+
+           Returns:
+             True if the end of file record was reached, otherwise False.
+        """
+        for lines in blocks:
+            for (recordtype, lowaddress, data, datasize, checksumcorrect) in self._parseihexlines(lines):
+                if not checksumcorrect and not ignore_checksum_errors:
+                    raise DecodeError("Checksum mismatch.")
+                if recordtype == 0:
+                    if highaddr is not None:
+                        self.set((highaddr + lowaddress), data, datasize)
+                    else:
+                        if (lowaddress + datasize) <= 0x10000:
+                            self.set((segmaddr + lowaddress), data, datasize)
+                        else:  # wrap on segment boundary:
+                            fit = 0x10000 - lowaddress
+                            self.set((segmaddr + lowaddress), data, fit)
+                            self.set(segmaddr, data[fit:])
+
+                    if self._bytesperline is None:
+                        self._bytesperline = datasize
+                elif recordtype == 1:
+                    # End of file
+                    return True
+                elif recordtype == 2:
+                    segmaddr = (data[0] << 12) | (data[1] << 4)
+                    highaddr = None
+                    if self._variant is None:
+                        self._variant = 16
+                elif recordtype == 3:
+                    self._cs_ip = (data[0] << 24) | (data[1] << 16) | (data[2] << 8) | data[3]
+                    if self._variant is None:
+                        self._variant = 16
+                elif recordtype == 4:
+                    highaddr = (data[0] << 24) | (data[1] << 16)
+                    segmaddr = None
+                    if self._variant is None:
+                        self._variant = 32
+                elif recordtype == 5:
+                    self._eip = (data[0] << 24) | (data[1] << 16) | (data[2] << 8) | data[3]
+                    if self._variant is None:
+                        self._variant = 32
+                else:
+                    raise DecodeError("Unsupported record type.")
+        return False
+
+    def _mergemetadata(self, other, overwrite_metadata=False):
+        """Take over the metadata of an instance loaded from a later part of the same file."""
+        if self._bytesperline is None:
+            self._bytesperline = other._bytesperline
+        if self._variant is None:
+            self._variant = other._variant
+        if other._cs_ip is not None:
+            self._cs_ip = other._cs_ip
+        if other._eip is not None:
+            self._eip = other._eip
+
     # noinspection PyIncorrectDocstring
     def toihexfile(self, filename, **settings):
         """Writes content as Intel-Hex file to given file name.
@@ -358,6 +478,7 @@ class IntelHex(HexFormat):
              variant ('I08HEX', 'I8HEX', 'I16HEX', 'I32HEX', 8, 16, 32): Variant of Intel-Hex format.
              cs_ip (int, 32-bit): Value of CS:IP starting address used for I16HEX variant.
              eip (int, 32-bit): Value of EIP starting address used for I32HEX variant.
+             workers (None or int): Number of worker processes. If None or 1 the data is encoded sequentially.
 
            Returns:
              self
@@ -366,11 +487,18 @@ class IntelHex(HexFormat):
             return self.toihexfh(fh, **settings)
 
     # noinspection PyIncorrectDocstring
-    def toihexfh(self, fh, **settings):
+    def toihexfh(self, fh, workers=None, **settings):
         """Writes content as Intel-Hex file to given file handle.
 
+           The data of every part is hex encoded in chunks of up to ENCODE_CHUNKSIZE bytes at once and all lines of
+           a chunk are written with a single writelines() call. If <workers> is larger than 1 the chunks are encoded
+           in parallel worker processes and written in address order. The extended address records are placed
+           exactly like by the sequential encoder, as the upper address in effect at the start of every chunk is
+           computed in advance by :meth:`_nextaddresshigh`.
+
            Args:
              fh (file handle or compatible): Destination of S-Record lines.
+             workers (None or int): Number of worker processes. If None or 1 the data is encoded sequentially.
              bytesperline (int): Number of bytes per line.
              variant ('I08HEX', 'I8HEX', 'I16HEX', 'I32HEX', 8, 16, 32): Variant of Intel-Hex format.
              cs_ip (int, 32-bit): Value of CS:IP starting address used for I16HEX variant.
@@ -383,37 +511,14 @@ class IntelHex(HexFormat):
              EncodeError: if selected address length is not wide enough to fit all addresses.
         """
         (bytesperline, cs_ip, eip, variant) = self._parse_settings(**settings)
-        highaddr = 0
-        addresshigh = 0
-        for address, buffer in self._parts:
-            pos = 0
-            datalength = len(buffer)
-            while pos < datalength:
-                if variant == 32:
-                    if address > 0xFFFFFFFF:
-                        raise EncodeError("Address to large for format.")
-                    addresslow = address & 0x0000FFFF
-                    addresshigh = address & 0xFFFF0000
-                elif variant == 16:
-                    if address > 0xFFFFF:
-                        raise EncodeError("Address to large for format.")
-                    if address > (addresshigh + 0x0FFFF):
-                        addresshigh = address & 0xFFF00
-                    addresslow = address - addresshigh
-                else:
-                    if address > 0xFFFF:
-                        raise EncodeError("Address to large for format.")
-                    addresslow = address
-                if addresshigh != highaddr:
-                    highaddr = addresshigh
-                    if variant == 32:
-                        fh.write(self._encodeihexline(4, 0, [addresshigh >> 24, (addresshigh >> 16) & 0xFF]))
-                    else:
-                        fh.write(self._encodeihexline(2, 0, [addresshigh >> 12, (addresshigh >> 4) & 0xFF]))
-                endpos = min(pos + bytesperline, datalength)
-                fh.write(self._encodeihexline(0, addresslow, buffer[pos:endpos]))
-                address += bytesperline
-                pos = endpos
+        # Encode data in chunks of whole records to limit the size of the temporary strings
+        chunks = partslices(self._parts, ENCODE_CHUNKSIZE, bytesperline)
+        if workers is not None and workers > 1:
+            self._saveparallel(fh, workers, '_encodeihexchunk', self._ihexchunktasks(chunks, bytesperline, variant))
+        else:
+            addresshigh = 0
+            for address, chunk in chunks:
+                addresshigh = self._encodeihexchunk(fh, chunk, address, bytesperline, variant, addresshigh)
         if variant == 32 and eip is not None:
             fh.write(self._encodeihexline(5, 0, [eip >> 24, (eip >> 16) & 0xFF, (eip >> 8) & 0xFF, eip & 0xFF]))
         elif variant == 16 and cs_ip is not None:
@@ -421,6 +526,113 @@ class IntelHex(HexFormat):
         fh.write(self._encodeihexline(1, 0, bytearray()))
         return self
 
+    def _encodeihexchunk(self, fh, chunk, address, bytesperline, variant, addresshigh=0):
+        """Encode chunk of data to Intel-Hex data records and write them to the given file handle.
+
+           An extended address record is written in front of every data record which upper address differs from
+           the one in effect before it. All lines are written with a single writelines() call.
+
+           Args:
+             fh (file handle or compatible): Destination of Intel-Hex lines.
+             chunk (Buffer): Data to be encoded.
+             address (int): Address of first byte in chunk.
+             bytesperline (int): Number of bytes per line.
+             variant (8, 16, 32): Variant of Intel-Hex format.
+             addresshigh (int): Upper address in effect before the chunk.
+
+           Returns:
+             addresshigh (int): Upper address in effect after the chunk.
+
+           Raises:
+             EncodeError: if selected address length is not wide enough to fit all addresses.
+        """
+        try:
+            writelines = fh.writelines
+        except AttributeError:
+            def writelines(lines):
+                for line in lines:
+                    fh.write(line)
+        highaddr = addresshigh
+        hexdata = binascii.hexlify(chunk).upper().decode()
+        datasums = checksum.blocksums(chunk, bytesperline)
+        chunklength = len(chunk)
+        lines = []
+        pos = 0
+        while pos < chunklength:
+            if variant == 32:
+                if address > 0xFFFFFFFF:
+                    raise EncodeError("Address to large for format.")
+                addresslow = address & 0x0000FFFF
+                addresshigh = address & 0xFFFF0000
+            elif variant == 16:
+                if address > 0xFFFFF:
+                    raise EncodeError("Address to large for format.")
+                if address > (addresshigh + 0x0FFFF):
+                    addresshigh = address & 0xFFF00
+                addresslow = address - addresshigh
+            else:
+                if address > 0xFFFF:
+                    raise EncodeError("Address to large for format.")
+                addresslow = address
+            if addresshigh != highaddr:
+                highaddr = addresshigh
+                if variant == 32:
+                    lines.append(self._encodeihexline(4, 0, [addresshigh >> 24, (addresshigh >> 16) & 0xFF]))
+                else:
+                    lines.append(self._encodeihexline(2, 0, [addresshigh >> 12, (addresshigh >> 4) & 0xFF]))
+            endpos = min(pos + bytesperline, chunklength)
+            bytecount = endpos - pos
+            recordsum = bytecount + datasums[pos // bytesperline] + (addresslow >> 8) + (addresslow & 0xFF)
+            lines.append(":%02X%04X00%s%02X\n" % (bytecount, addresslow, hexdata[2 * pos:2 * endpos],
+                                                  -recordsum & 0xFF))
+            address += bytesperline
+            pos = endpos
+        writelines(lines)
+        return addresshigh
+
+    @classmethod
+    def _ihexchunktasks(cls, chunks, bytesperline, variant):
+        """Yield the arguments of :meth:`_encodeihexchunk` for all chunks, including the upper address in effect
+           before every chunk."""
+        addresshigh = 0
+        for address, chunk in chunks:
+            yield chunk, address, bytesperline, variant, addresshigh
+            addresshigh = cls._nextaddresshigh(addresshigh, address, len(chunk), bytesperline, variant)
+
+    @staticmethod
+    def _nextaddresshigh(addresshigh, address, size, bytesperline, variant):
+        """Return the upper address in effect after encoding data records of the given range.
+
+           The result is equal to the one of :meth:`_encodeihexchunk` but is computed without encoding the data.
+           For the I16HEX variant the upper address only changes for records which do not fit below the current
+           one, so the records in between are skipped.
+
+           Args:
+             addresshigh (int): Upper address in effect before the range.
+             address (int): Start address of range.
+             size (int): Size of range in bytes.
+             bytesperline (int): Number of bytes per line.
+             variant (8, 16, 32): Variant of Intel-Hex format.
+
+           Returns:
+             addresshigh (int): Upper address in effect after the range.
+        """
+        if size <= 0:
+            return addresshigh
+        lastaddress = address + ((size - 1) // bytesperline) * bytesperline
+        if variant == 32:
+            return lastaddress & 0xFFFF0000
+        elif variant == 16:
+            while True:
+                if address > (addresshigh + 0x0FFFF):
+                    addresshigh = address & 0xFFF00
+                # Addresses above 0xFFFFF are not encoded, see EncodeError of _encodeihexchunk
+                if lastaddress <= addresshigh + 0x0FFFF or address > 0xFFFFF:
+                    return addresshigh
+                # Skip to the first record above the current segment
+                address += -(-(addresshigh + 0x10000 - address) // bytesperline) * bytesperline
+        return addresshigh
+
     # noinspection PyProtectedMember
     def __eq__(self, other):
         """Compare with other instance for equality.
@@ -23,15 +23,40 @@
 
 """
 
+import bisect
 import collections.abc as collections
 import copy
+import heapq
+import itertools
+import mmap
+import re
 
-from hexformat.fillpattern import FillPattern, int_to_bytes
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from hexformat.fillpattern import FillPattern, RandomContent, int_to_bytes
+from hexformat.pagedbuffer import DEFAULT_PAGESIZE, PagedBuffer, readonlyview
 
 MOD_USABLE_BUFFER_FOUND = 0
 MOD_NO_BUFFER_FOUND_NEXT_HIGHER_USED = 1
 MOD_BEYOND_END_LAST_BUFFER_USED = -1
 
+WRITE_CHUNKSIZE = 1 << 20  # Maximal size of fill data generated at once when writing binary files
+RUN_CHUNKSIZE = 1 << 24  # Maximal number of bytes compared at once by the NumPy run detection
+PREPEND_DEFER_SIZE = 1 << 12  # Minimal size of a bytearray part for which data inserted in front is collected first
+
+
+def partviews(buffer, start, stop):
+    """Yield (offset, read-only memoryview) tuples covering buffer[start:stop] of a part buffer.
+
+       A bytearray is covered by a single view, a :class:`PagedBuffer` by one view per page.
+    """
+    if isinstance(buffer, PagedBuffer):
+        return buffer.views(start, stop)
+    return ((start, readonlyview(buffer)[start:stop]),)
+
 
 def ensurebuffer(buforint):
     if isinstance(buforint, bytearray):
@@ -42,6 +67,208 @@ def ensurebuffer(buforint):
         return bytearray((buforint,))
 
 
+def patternruns(buffer, pattern, start=0, stop=None, blocksize=None, offset=0):
+    """Return list of (start, stop) index pairs of all runs of repetitions of pattern in buffer[start:stop].
+
+       The runs are searched from left to right, i.e. a run begins at the first occurrence of the pattern after
+       the end of the previous run. Runs of a single byte are detected with NumPy if available, longer patterns
+       with a regular expression.
+
+       Args:
+         buffer (Buffer or PagedBuffer): Data to be searched.
+         pattern (bytes or bytearray): Non-empty pattern.
+         start (int): Start index of the search range.
+         stop (None or int): End index of the search range. If None the end of the buffer is used.
+         blocksize (None or int): If given the search range is divided into blocks of this size and every block
+                                  is searched on its own, i.e. runs end at the block boundaries.
+         offset (int): Address of buffer[0]. The block boundaries are aligned to addresses, not to indices.
+    """
+    if stop is None:
+        stop = len(buffer)
+    if isinstance(buffer, PagedBuffer):
+        return [(runstart + start, runstop + start) for runstart, runstop in
+                patternruns(buffer[start:stop], pattern, 0, stop - start, blocksize, offset + start)]
+    if blocksize is not None and len(pattern) > 1:
+        # A longer pattern may be found at a different phase in every block, so search each block separately
+        runs = []
+        blockstart = start
+        while blockstart < stop:
+            blockstop = min(stop, blockstart + blocksize - (offset + blockstart) % blocksize)
+            runs.extend(patternruns(buffer, pattern, blockstart, blockstop))
+            blockstart = blockstop
+        return runs
+    if numpy is not None and len(pattern) == 1:
+        runs = _numpyruns(buffer, pattern[0], start, stop)
+    else:
+        regex = re.compile(b'(?:' + re.escape(bytes(pattern)) + b')+')
+        runs = [match.span() for match in regex.finditer(buffer, start, stop)]
+    if blocksize is None:
+        return runs
+    blockruns = []
+    for runstart, runstop in runs:
+        boundary = runstart + blocksize - (offset + runstart) % blocksize
+        while boundary < runstop:
+            blockruns.append((runstart, boundary))
+            runstart = boundary
+            boundary += blocksize
+        blockruns.append((runstart, runstop))
+    return blockruns
+
+
+def _numpyruns(buffer, byte, start, stop):
+    """Return list of (start, stop) index pairs of all runs of the given byte in buffer[start:stop] using NumPy.
+       The data is compared in chunks of RUN_CHUNKSIZE bytes to limit the size of the temporary arrays.
+    """
+    array = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    runs = []
+    for chunkstart in range(start, stop, RUN_CHUNKSIZE):
+        chunkstop = min(chunkstart + RUN_CHUNKSIZE, stop)
+        mask = numpy.zeros(chunkstop - chunkstart + 2, dtype=bool)
+        numpy.equal(array[chunkstart:chunkstop], byte, out=mask[1:-1])
+        edges = (numpy.flatnonzero(mask[1:] != mask[:-1]) + chunkstart).tolist()
+        chunkruns = list(zip(edges[0::2], edges[1::2]))
+        if runs and chunkruns and runs[-1][1] == chunkruns[0][0]:
+            runs[-1] = (runs[-1][0], chunkruns.pop(0)[1])
+        runs.extend(chunkruns)
+    return runs
+
+
+def mergeparts(partlists, owned=None, newbuffer=None):
+    """Merge several sorted part lists in a single sweep.
+
+       Where parts overlap the data of the list with the higher index is used. Parts which touch or overlap are
+       combined into one part.
+
+       Args:
+         partlists (list): Lists of [address, buffer] pairs, each sorted by address without overlapping parts like
+                           :attr:`MultiPartBuffer._parts`. Ordered by increasing priority.
+         owned (None or int): Index of the part list which buffers can be reused in the result if they are not
+                              modified. The buffers of all other lists are copied.
+         newbuffer (None or callable): Called with the start address to create an empty buffer for a new part.
+                                       If None a bytearray is used.
+
+       Returns:
+         New sorted list of [address, buffer] pairs.
+    """
+    def sources(priority, parts):
+        for address, buffer in parts:
+            if len(buffer) > 0:
+                yield address, priority, buffer
+
+    result = []
+    active = []  # heap of (-priority, end address, start address, buffer) of all parts covering pos
+    segments = []  # (start, stop, priority, bufferstart, buffer) segments of the current contiguous run
+    pos = None
+    events = heapq.merge(*[sources(priority, parts) for priority, parts in enumerate(partlists)])
+    for start, priority, buffer in itertools.chain(events, ((None, None, None),)):
+        # Assign the range up to the next part start to the active part with the highest priority
+        while active and (start is None or pos < start):
+            negpriority, end, bufferstart, topbuffer = active[0]
+            if end <= pos:
+                heapq.heappop(active)
+                continue
+            stop = end if start is None else min(end, start)
+            if segments and segments[-1][4] is topbuffer:
+                segments[-1] = segments[-1][0:1] + (stop,) + segments[-1][2:]
+            else:
+                segments.append((pos, stop, -negpriority, bufferstart, topbuffer))
+            pos = stop
+        if segments and (start is None or pos < start):
+            # Gap or end reached: store current run as part
+            runstart, stop, runpriority, bufferstart, runbuffer = segments[0]
+            if len(segments) == 1 and runpriority == owned and runstart == bufferstart and \
+                    stop - runstart == len(runbuffer):
+                result.append([runstart, runbuffer])
+            else:
+                runbuffer = bytearray() if newbuffer is None else newbuffer(runstart)
+                for segstart, segstop, segpriority, bufferstart, segbuffer in segments:
+                    for offset, view in partviews(segbuffer, segstart - bufferstart, segstop - bufferstart):
+                        runbuffer.extend(view)
+                result.append([runstart, runbuffer])
+            segments = []
+        if start is None:
+            break
+        if not active:
+            pos = start
+        heapq.heappush(active, (-priority, start + len(buffer), start, buffer))
+    return result
+
+
+class ByteMapping(collections.Mapping):
+    """Read-only mapping view of the content of a MultiPartBuffer with a key for every used address.
+
+       The view behaves like the dictionary returned by :meth:`MultiPartBuffer.todict` but does not store the bytes
+       itself: lookups are answered from the parts of the instance using a binary search, so the view is always
+       up-to-date with the instance.
+
+       Args:
+         inst (MultiPartBuffer): Instance which content is viewed.
+    """
+
+    def __init__(self, inst):
+        self._inst = inst
+
+    def __getitem__(self, address):
+        if not isinstance(address, int):
+            raise KeyError(address)
+        parts = self._inst._parts
+        index = bisect.bisect_right(self._inst._starts, address) - 1
+        if index >= 0:
+            start, buffer = parts[index]
+            if address < start + len(buffer):
+                return buffer[address - start]
+        raise KeyError(address)
+
+    def __iter__(self):
+        for address, buffer in self._inst._parts:
+            for addr in range(address, address + len(buffer)):
+                yield addr
+
+    def __len__(self):
+        return self._inst.usedsize()
+
+    def __repr__(self):
+        return "<{:s} of {:d} bytes in {:d} parts>".format(self.__class__.__name__, len(self), len(self._inst._parts))
+
+
+class PartList(list):
+    """List of the [address, buffer] parts of a :class:`MultiPartBuffer`.
+
+       Besides the parts the list holds data to be inserted in front of one bytearray part, collected by
+       :meth:`MultiPartBuffer._prepend` from data given in descending address order. The data is inserted in a
+       single step by :meth:`flush` when the parts are accessed next. It is stored with the list and not with the
+       instance, because instances created by a shallow copy share the part list.
+    """
+    pending = None  # None or [part, size, chunks, starts] of the deferred data
+
+    def defer(self, part, starts, data):
+        """Collect data to be inserted in front of given part.
+
+           Args:
+             part (list): [address, buffer] pair of this list. The buffer must be a bytearray.
+             starts (list): Start address index of the instance which must be updated with the part address.
+             data (bytes): Data to be inserted, in front of all data collected before.
+        """
+        if self.pending is not None and self.pending[0] is not part:
+            self.flush()
+        if self.pending is None:
+            self.pending = [part, 0, [], starts]
+        self.pending[1] += len(data)
+        self.pending[2].append(data)
+
+    def flush(self):
+        """Insert the collected data in front of its part and update its start address."""
+        part, size, chunks, starts = self.pending
+        self.pending = None
+        index = bisect.bisect_left(starts, part[0])
+        chunks.reverse()
+        buffer = bytearray().join(chunks)
+        buffer += part[1]
+        part[1] = buffer
+        part[0] -= size
+        starts[index] = part[0]
+
+
 class MultiPartBuffer(object):
     # noinspection PyUnresolvedReferences
     """Class to handle disconnected binary data.
@@ -52,13 +279,50 @@ class MultiPartBuffer(object):
          _STANDARD_FORMAT (str): The standard format used by :meth:`.fromfh` and :meth:`.fromfile` if no format
                                  was given.
          _padding (int, iterable or FillPattern): Standard fill pattern.
+         _parts (PartList): Sorted list of [address, buffer] pairs, one for each part. Data collected in front
+                            of a part by :meth:`_prepend` is inserted first when the list is accessed.
+         _starts (list): Sorted list of the start addresses of all parts, i.e. the same order as _parts.
+                         Used as search index for bisection and must be kept in sync with _parts.
+         _cursor (None or tuple): (index, part) of the part written last by :meth:`set`. Used to append sequential
+                                  data directly. Only valid while _parts[index] is still the identical part.
+         _shared (set): Ids of part buffers which may be shared with copies of the instance. Such buffers are
+                        copied by :meth:`_writable` before they are modified (copy-on-write).
+         _pagesize (None or int): If None the parts are stored as bytearrays. Otherwise the parts are stored as
+                                  :class:`PagedBuffer` with pages of this size, see :meth:`usepages`.
     """
     _STANDARD_FORMAT = 'bin'
     _padding = 0xFF
+    _pagesize = None
 
     def __init__(self):
         super(MultiPartBuffer, self).__init__()
         self._parts = list()
+        self._starts = list()
+        self._cursor = None
+        self._shared = set()
+
+    @property
+    def _parts(self):
+        parts = self._partlist
+        if parts.pending is not None:
+            parts.flush()
+        return parts
+
+    @_parts.setter
+    def _parts(self, parts):
+        if not isinstance(parts, PartList):
+            parts = PartList(parts)
+        self._partlist = parts
+
+    @property
+    def _starts(self):
+        if self._partlist.pending is not None:
+            self._partlist.flush()
+        return self._startlist
+
+    @_starts.setter
+    def _starts(self, starts):
+        self._startlist = starts
 
     def __repr__(self):
         """Print representation including class name, id, number of parts, range and used size."""
@@ -73,7 +337,42 @@ class MultiPartBuffer(object):
         """Compare with other instance for equality."""
         return self._parts == other._parts
 
-    def _create(self, beforeindex, address, data=list()):
+    def usepages(self, pagesize=DEFAULT_PAGESIZE):
+        """Select the storage of the parts.
+
+           With paged storage every part is stored in pages of <pagesize> bytes aligned to the address space.
+           Inserting data in front of a part, deleting parts of it and merging neighbouring parts then only
+           touches the pages at the affected addresses instead of copying the whole part, which makes these
+           operations independent of the part size. Reading the data is slightly slower.
+           All existing parts are converted.
+
+           Args:
+             pagesize (None or int): Size of the pages in bytes. If None the parts are stored as contiguous
+                                     bytearrays again.
+
+           Returns:
+             self
+        """
+        if pagesize is not None:
+            pagesize = int(pagesize)
+            if pagesize < 1:
+                raise ValueError("pagesize must be positive")
+        self._pagesize = pagesize
+        for part in self._parts:
+            part[1] = self._newbuffer(part[0], part[1])
+        self._shared = set()
+        self._cursor = None
+        return self
+
+    def _newbuffer(self, address, data=b''):
+        """Return new part buffer for given start address and data, using the selected part storage."""
+        if self._pagesize is None:
+            if isinstance(data, PagedBuffer):
+                return data[:]
+            return bytearray(data)
+        return PagedBuffer(data, self._pagesize, address)
+
+    def _create(self, beforeindex, address, data=b''):
         """Create new buffer before index or at end if index is None.
         
            Args:
@@ -81,11 +380,50 @@ class MultiPartBuffer(object):
              address (int): Address of first byte in data buffer.
              data (Buffer): Data to be stored.
         """
-        buffer = bytearray(data)
+        buffer = self._newbuffer(address, data)
         if beforeindex is None:
             self._parts.append([address, buffer])
+            self._starts.append(address)
         else:
             self._parts.insert(beforeindex, [address, buffer])
+            self._starts.insert(beforeindex, address)
+
+    def _reindex(self):
+        """Rebuild the start address index from the part list.
+
+           Must be called after the part list was replaced or modified directly. The index is rebuilt in place, as
+           a shallow copy made by :meth:`hexformat.base.HexFormat.fromother` shares the part list and the index.
+        """
+        self._starts[:] = [address for address, buffer in self._parts]
+
+    def _remove(self, index):
+        """Remove part with given index and return it."""
+        del self._starts[index]
+        return self._parts.pop(index)
+
+    def _move(self, index, address):
+        """Set the start address of part with given index."""
+        self._parts[index][0] = address
+        self._starts[index] = address
+
+    def _writable(self, index):
+        """Return buffer of part with given index for in-place modification.
+
+           A buffer which is shared with a copy of the instance is replaced by a private copy first.
+        """
+        part = self._parts[index]
+        if self._shared and id(part[1]) in self._shared:
+            self._shared.discard(id(part[1]))
+            part[1] = part[1].copy()
+        return part[1]
+
+    def _copyparts(self):
+        """Return copy of the part list which shares all part buffers with this instance.
+
+           All buffers are marked as shared, the receiver of the part list must copy _shared as well.
+        """
+        self._shared = set(id(buffer) for address, buffer in self._parts)
+        return PartList([address, buffer] for address, buffer in self._parts)
 
     def _find(self, address, size, create=True):
         """Find buffer corresponding to data block given by address and size.
@@ -104,32 +442,36 @@ class MultiPartBuffer(object):
                 -1: MOD_BEYOND_END_LAST_BUFFER_USED: Address lies after all buffers. Index states last buffer before
                                                      address.
         """
-        dataend = address + size
-        for index, part in enumerate(self._parts):
-            bufstart, buffer = part
-            bufend = bufstart + len(buffer)
-            if address < bufstart:
-                if dataend < bufstart:
-                    if create:
-                        self._create(index, address)
-                        return index, MOD_USABLE_BUFFER_FOUND
-                    else:
-                        return index, MOD_NO_BUFFER_FOUND_NEXT_HIGHER_USED
-                else:
-                    return index, MOD_USABLE_BUFFER_FOUND
-            elif address <= bufend:
+        parts = self._parts
+        # First part which starts at or after address. Only the part before it can contain address.
+        index = bisect.bisect_left(self._starts, address)
+        if index > 0:
+            bufstart, buffer = parts[index - 1]
+            if address <= bufstart + len(buffer):
+                return index - 1, MOD_USABLE_BUFFER_FOUND
+        if index < len(parts):
+            bufstart = parts[index][0]
+            if address == bufstart or address + size >= bufstart:
                 return index, MOD_USABLE_BUFFER_FOUND
+            if create:
+                self._create(index, address)
+                return index, MOD_USABLE_BUFFER_FOUND
+            else:
+                return index, MOD_NO_BUFFER_FOUND_NEXT_HIGHER_USED
         # If this line is reached no matching buffer was found and address lies after all buffers
-        index = (len(self._parts) - 1)
         if create:
             self._create(None, address)
-            index += 1
             return index, MOD_USABLE_BUFFER_FOUND
         else:
-            return index, MOD_BEYOND_END_LAST_BUFFER_USED
+            return index - 1, MOD_BEYOND_END_LAST_BUFFER_USED
 
     def _insert(self, index, newdata, datasize, dataoffset):
         """Insert new data at begin of existing buffer. Reduce starting address of buffer accordantly.
+
+           With paged storage (see :meth:`usepages`) the first page of the part provides head room for further
+           inserts, so that data given in descending address order is not copied again with every insert. A
+           bytearray part of such an instance is converted to a :class:`PagedBuffer` first. Without paged storage
+           the part stays a bytearray and is rebuilt.
         
            Args:
              index (int): Index of buffer.
@@ -142,8 +484,37 @@ class MultiPartBuffer(object):
             data = newdata
         else:
             data = newdata[dataoffset:dataoffset + datasize]
-        self._parts[index][1] = bytearray(data) + self._parts[index][1]
-        self._parts[index][0] -= datasize  # adjust address
+        address, buffer = self._parts[index]
+        if isinstance(buffer, PagedBuffer):
+            self._writable(index).prepend(data)
+        elif self._pagesize is not None:
+            self._shared.discard(id(buffer))
+            buffer = PagedBuffer(buffer, self._pagesize, address)
+            buffer.prepend(data)
+            self._parts[index][1] = buffer
+        else:
+            self._parts[index][1] = bytearray(data) + buffer
+        self._move(index, self._parts[index][0] - datasize)  # adjust address
+
+    def _prepend(self, index, newdata, datasize, dataoffset):
+        """Insert new data in front of the part with given index like :meth:`_insert`.
+
+           Data in front of a bytearray part of at least PREPEND_DEFER_SIZE bytes is collected by the part list
+           and inserted in a single step when the parts are accessed next, see :class:`PartList`. Data given in
+           descending address order is thereby copied only once instead of with every insert.
+
+           Args:
+             index (int): Index of buffer.
+             newdata (Buffer): Data buffer with new data to be inserted.
+             datasize (int): Size of data be added.
+             dataoffset (int): Starting read offset of newdata.
+        """
+        parts = self._partlist
+        part = parts[index]
+        if parts.pending is None and (type(part[1]) is not bytearray or len(part[1]) < PREPEND_DEFER_SIZE):
+            self._insert(index, newdata, datasize, dataoffset)
+        else:
+            parts.defer(part, self._startlist, bytes(newdata[dataoffset:dataoffset + datasize]))
 
     def _set(self, index, address, newdata, datasize, dataoffset):
         """Store new data in given buffer at given address. New data is read from given offset for the given size.
@@ -157,7 +528,7 @@ class MultiPartBuffer(object):
         """
         bufferstart = self._parts[index][0]
         bufferoffset = address - bufferstart
-        self._parts[index][1][bufferoffset:bufferoffset + datasize] = newdata[dataoffset:dataoffset + datasize]
+        self._writable(index)[bufferoffset:bufferoffset + datasize] = newdata[dataoffset:dataoffset + datasize]
 
     def _extend(self, index, newdata, datasize, dataoffset):
         """Extend given buffer with the new data.
@@ -172,7 +543,7 @@ class MultiPartBuffer(object):
             data = newdata
         else:
             data = newdata[dataoffset:dataoffset + datasize]
-        self._parts[index][1].extend(data)
+        self._writable(index).extend(data)
 
     def _merge(self, index):
         """Merge the given buffer with the next following one.
@@ -180,8 +551,14 @@ class MultiPartBuffer(object):
            Args:
              index (int): Index of first buffer which will be merged with the next buffer.
         """
-        nextpart = self._parts.pop(index + 1)
-        self._parts[index][1].extend(nextpart[1])
+        nextpart = self._remove(index + 1)
+        buffer = self._writable(index)
+        if isinstance(buffer, PagedBuffer) and isinstance(nextpart[1], PagedBuffer) and \
+                id(nextpart[1]) not in self._shared:
+            buffer.adopt(nextpart[1])
+        else:
+            for offset, view in partviews(nextpart[1], 0, len(nextpart[1])):
+                buffer.extend(view)
 
     def setint(self, address, intvalue, datasize, byteorder='big', signed=False, overwrite=True):
         """Set integer value at given address."""
@@ -196,70 +573,125 @@ class MultiPartBuffer(object):
         if datasize is None:
             datasize = len(newdata) - dataoffset
 
-        if datasize == 0:
-            return self
+        # Every iteration stores the data up to the end of one part, merging it with the next part if required
+        while datasize > 0:
+            # Fast path for sequential data: append or prepend directly to the part written last
+            if self._cursor is not None:
+                index, part = self._cursor
+                parts = self._partlist
+                if index < len(parts) and parts[index] is part:
+                    if address == part[0] + len(part[1]):
+                        nextindex = index + 1
+                        if nextindex == len(parts) or self._starts[nextindex] > address + datasize:
+                            self._extend(index, newdata, datasize, dataoffset)
+                            return self
+                    elif address + datasize == part[0] - (0 if parts.pending is None else parts.pending[1]):
+                        if index == 0 or parts[index - 1][0] + len(parts[index - 1][1]) < address:
+                            self._prepend(index, newdata, datasize, dataoffset)
+                            return self
+
+            (index, mod) = self._find(address, datasize, create=True)
+            self._cursor = (index, self._parts[index])
+            endaddress = address + datasize
 
-        (index, mod) = self._find(address, datasize, create=True)
-        endaddress = address + datasize
+            bufferstart, buffer = self._parts[index]
+            bufferend = bufferstart + len(buffer)
 
-        bufferstart, buffer = self._parts[index]
-        bufferend = bufferstart + len(buffer)
+            # Insert left overlapping data
+            if address < bufferstart:
+                before = bufferstart - address
+                self._insert(index, newdata, before, dataoffset)
+                # Adjust values for remaining data
+                datasize -= before
+                dataoffset += before
+                address += before
 
-        # Insert left overlapping data
-        if address < bufferstart:
-            before = bufferstart - address
-            self._insert(index, newdata, before, dataoffset)
-            # Adjust values for remaining data
-            datasize -= before
-            dataoffset += before
-            address += before
+            # Overwrite existing data
+            if datasize > 0:
+                size = min(datasize, bufferend - address)
+                if overwrite:
+                    self._set(index, address, newdata, size, dataoffset)
+                datasize -= size
+                dataoffset += size
+                address += size
 
-        # Overwrite existing data
-        if datasize > 0:
-            size = min(datasize, bufferend - address)
-            if overwrite:
-                self._set(index, address, newdata, size, dataoffset)
-            datasize -= size
-            dataoffset += size
-            address += size
-
-        # Insert right overlapping data
-        if endaddress > bufferend:
-            nextindex = index + 1
-
-            nextbufferstart = None
-            if nextindex < len(self._parts):
-                nextbufferstart = self._parts[nextindex][0]
-
-            # Check if data does not reach into next buffer
-            if nextbufferstart is None or nextbufferstart > endaddress:
-                after = endaddress - bufferend
-                self._extend(index, newdata, after, dataoffset)
-            else:
-                gap = nextbufferstart - bufferend
-                self._extend(index, newdata, gap, dataoffset)
-                datasize -= gap
-                dataoffset += gap
-                address += gap
-                self._merge(index)
-                self.set(address, newdata, datasize, dataoffset, overwrite)
+            # Insert right overlapping data
+            if endaddress > bufferend:
+                nextindex = index + 1
+
+                nextbufferstart = None
+                if nextindex < len(self._parts):
+                    nextbufferstart = self._parts[nextindex][0]
+
+                # Check if data does not reach into next buffer
+                if nextbufferstart is None or nextbufferstart > endaddress:
+                    after = endaddress - bufferend
+                    self._extend(index, newdata, after, dataoffset)
+                else:
+                    gap = nextbufferstart - bufferend
+                    self._extend(index, newdata, gap, dataoffset)
+                    datasize -= gap
+                    dataoffset += gap
+                    address += gap
+                    self._merge(index)
+                    continue
+            break
         return self
 
     def crop(self, address, size=None):
-        """Crop content to range <address>+<size> by deleting all other content."""
+        """Crop content to range <address>+<size> by deleting all other content.
+
+           All parts outside of the range are dropped at once and the parts at the range boundaries are trimmed
+           in place.
+        """
         address, size = self._checkaddrnsize(address, size)
-        start, totalsize = self.range()
-        end = start + totalsize
-        self.delete(start, address - start)
-        self.delete(address + size, end - address)
+        if size <= 0:
+            del self._parts[:]
+            del self._starts[:]
+            return self
+        endaddress = address + size
+        first, last = self._span(address, endaddress)
+        del self._parts[last:]
+        del self._starts[last:]
+        del self._parts[:first]
+        del self._starts[:first]
+        if self._parts:
+            bufferstart = self._parts[0][0]
+            if bufferstart < address:
+                self._cutpart(0, 0, address - bufferstart)
+                self._move(0, address)
+            bufferstart, buffer = self._parts[-1]
+            if bufferstart + len(buffer) > endaddress:
+                self._cutpart(len(self._parts) - 1, endaddress - bufferstart, None)
         return self
 
     def extract(self, address, size=None, keep=True):
         """Extract given range and return it as new instance. Gaps in the range are preserved.
            The <keep> argument controls if the range is kept in the original instance or deleted.
+
+           Only the bytes of the parts at the range boundaries are copied. Parts which lie completely inside
+           the range are shared copy-on-write with the new instance if kept, or moved to it otherwise.
         """
-        new = self.copy()
-        new.crop(address, size)
+        address, size = self._checkaddrnsize(address, size)
+        new = self._emptycopy()
+        if size <= 0:
+            return new
+        endaddress = address + size
+        first, last = self._span(address, endaddress)
+        for bufferstart, buffer in self._parts[first:last]:
+            start = max(address, bufferstart) - bufferstart
+            stop = min(endaddress, bufferstart + len(buffer)) - bufferstart
+            if start == 0 and stop == len(buffer):
+                if keep:
+                    self._shared.add(id(buffer))
+                if keep or id(buffer) in self._shared:
+                    new._shared.add(id(buffer))
+            elif isinstance(buffer, PagedBuffer):
+                buffer = buffer.copy(start, stop)
+            else:
+                buffer = buffer[start:stop]
+            new._parts.append([bufferstart + start, buffer])
+        new._reindex()
         if not keep:
             self.delete(address, size)
         return new
@@ -292,6 +724,7 @@ class MultiPartBuffer(object):
             raise ValueError("offset < -start")
         for part in self._parts:
             part[0] += offset
+        self._reindex()
         return self
 
     def relocate(self, newaddress, address=None, size=None, overwrite=True):
@@ -326,55 +759,93 @@ class MultiPartBuffer(object):
             return self.get(address, size)
 
     def delete(self, address, size=None):
-        """Deletes <size> bytes starting from <address>. Does nothing if <size> is non-positive."""
-        address, size = self._checkaddrnsize(address, size)
-        while size > 0:
-            (index, mod) = self._find(address, size, create=True)
-            bufferstart, buffer = self._parts[index]
-            buffersize = len(buffer)
-            if address < bufferstart:
-                size -= bufferstart - address
-                address = bufferstart
-            leading = address - bufferstart
-            trailing = bufferstart + buffersize - address - size
-            trailaddress = address + size
-            if trailing > 0:
-                if leading > 0:
-                    self._parts[index][1] = buffer[0:leading]
-                    self._create(index + 1, trailaddress, buffer[buffersize - trailing:buffersize])
-                else:
-                    self._parts[index][1] = buffer[buffersize - trailing:buffersize]
-                    self._parts[index][0] = trailaddress
-                break
-            else:
-                nextbufferstart = None
-                if index < len(self._parts) - 1:
-                    nextbufferstart = self._parts[index + 1][0]
+        """Deletes <size> bytes starting from <address>. Does nothing if <size> is non-positive.
 
-                if leading > 0:
-                    self._parts[index][1] = buffer[0:leading]
-                else:
-                    self._parts.pop(index)  # index now points to NEXT part
-
-                if nextbufferstart is None:
-                    break
-                size = -trailing
-                address = bufferstart + buffersize
-                gap = nextbufferstart - address
-                address += gap
-                size -= gap
+           All parts inside the range are dropped at once and the parts at the range boundaries are trimmed
+           in place.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        if size <= 0:
+            return self
+        endaddress = address + size
+        first, last = self._span(address, endaddress)
+        if first == last:
+            return self
+        bufferstart, buffer = self._parts[first]
+        if bufferstart < address:
+            if bufferstart + len(buffer) > endaddress:
+                # Range lies inside a single part
+                self._splitpart(first, endaddress - bufferstart)
+                self._cutpart(first, address - bufferstart, None)
+                return self
+            self._cutpart(first, address - bufferstart, None)
+            first += 1
+        if last > first:
+            bufferstart, buffer = self._parts[last - 1]
+            if bufferstart + len(buffer) > endaddress:
+                self._cutpart(last - 1, 0, endaddress - bufferstart)
+                self._move(last - 1, endaddress)
+                last -= 1
+        del self._parts[first:last]
+        del self._starts[first:last]
         return self
 
-    def _filler(self, size, fillpattern):
-        """Generate buffer with given fillpattern and size."""
-        size = int(size)
+    def _span(self, address, endaddress):
+        """Return (first, last) indices of the parts overlapping the range address:endaddress,
+           i.e. self._parts[first:last] are these parts.
+        """
+        first = bisect.bisect_right(self._starts, address) - 1
+        if first < 0 or self._parts[first][0] + len(self._parts[first][1]) <= address:
+            first += 1
+        last = bisect.bisect_left(self._starts, endaddress, first)
+        return first, last
+
+    def _cutpart(self, index, start, stop):
+        """Delete range start:stop from the buffer of the part with given index in place.
+           The start address is unchanged.
+        """
+        del self._writable(index)[start:stop]
+
+    def _splitpart(self, index, pos):
+        """Split the part with given index at buffer position pos into two parts."""
+        address = self._parts[index][0]
+        buffer = self._writable(index)
+        if isinstance(buffer, PagedBuffer):
+            tail = buffer.split(pos)
+        else:
+            tail = buffer[pos:]
+            del buffer[pos:]
+        self._parts.insert(index + 1, [address + pos, tail])
+        self._starts.insert(index + 1, address + pos)
+
+    def _fillpattern(self, fillpattern):
+        """Return FillPattern instance for given fillpattern. Raises fillpattern if it is an exception."""
         if isinstance(fillpattern, BaseException) or (
             type(fillpattern) == type and issubclass(fillpattern, BaseException)):
             raise fillpattern
         if fillpattern is None:
             fillpattern = self._padding
-        fillpattern = FillPattern.frompattern(fillpattern)
-        return bytearray(fillpattern[0:size])
+        if isinstance(fillpattern, FillPattern):
+            return fillpattern
+        if isinstance(fillpattern, type) and issubclass(fillpattern, FillPattern):
+            return fillpattern()
+        return FillPattern(fillpattern)
+
+    def _filler(self, size, fillpattern):
+        """Generate buffer with given fillpattern and size."""
+        return self._fillpattern(fillpattern).tobytes(0, int(size))
+
+    def _iterfiller(self, size, fillpattern, chunksize=None):
+        """Generate filler with given fillpattern and size as buffers of at most <chunksize> bytes (default:
+           WRITE_CHUNKSIZE). The pattern continues over the chunk boundaries, i.e. the joined chunks are equal to
+           the result of :meth:`_filler`.
+        """
+        size = int(size)
+        if chunksize is None:
+            chunksize = WRITE_CHUNKSIZE
+        fillpattern = self._fillpattern(fillpattern)
+        for pos in range(0, size, chunksize):
+            yield fillpattern.tobytes(pos, min(chunksize, size - pos))
 
     def _checkaddrnsize(self, address, size):
         """Helper method: Ensure proper address and size values.
@@ -402,47 +873,71 @@ class MultiPartBuffer(object):
         return self
 
     def unfill(self, address=None, size=None, unfillpattern=None, mingapsize=16, unfillboundaries=True):
-        """Removes <unfillpattern> and leaves a gap, as long a resulting new gap would be least <mingapsize> large."""
-        if len(self._parts) == 0:
-            return self
+        """Removes <unfillpattern> and leaves a gap, as long a resulting new gap would be least <mingapsize> large.
+
+           All runs of the pattern are found in a single pass using :func:`patternruns` and the part list is
+           rebuilt once, see :meth:`_unfill`.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        return self._unfill(address, address + size, unfillpattern, mingapsize, unfillboundaries)
+
+    def _unfill(self, address, endaddress, unfillpattern, mingapsize, unfillboundaries, blocksize=None):
+        """Remove all qualifying runs of unfillpattern in range address:endaddress and rebuild the part list.
+
+           A run qualifies if it is at least <mingapsize> bytes long or, if <unfillboundaries> is True, if it
+           starts at the beginning of the searched range or ends at the end of its part. If <blocksize> is given,
+           the runs are searched in every address aligned block on its own, i.e. every block is a searched range.
+        """
         if unfillpattern is None:
             unfillpattern = self._padding
         if isinstance(unfillpattern, int):
             unfillpattern = [unfillpattern, ]
         unfillpattern = bytearray(unfillpattern)
-        ufvlen = len(unfillpattern)
-        address, size = self._checkaddrnsize(address, size)
-        (index, mod) = self._find(address, size, create=False)
-        if mod != MOD_USABLE_BUFFER_FOUND:
+        if not unfillpattern or endaddress <= address:
             return self
-        uflist = list()
-        while index < len(self._parts) and size > 0:
-            bufferstart, buffer = self._parts[index]
+        first, last = self._span(address, endaddress)
+        if first == last:
+            return self
+        parts = self._parts
+        newparts = parts[:first]
+        for index in range(first, last):
+            bufferstart, buffer = parts[index]
             buffersize = len(buffer)
-            startpos = address - bufferstart
-            if startpos < 0:
-                size += startpos
-                startpos = 0
-            maxpos = min(startpos + size, buffersize)
-            pos = startpos
-            try:
-                while pos < maxpos:
-                    delstartpos = buffer.index(unfillpattern, pos, maxpos)
-                    pos = delstartpos + ufvlen
-                    while buffer.startswith(unfillpattern, pos, maxpos):
-                        pos += ufvlen
-                    ufsize = pos - delstartpos
-                    # always delete at part boundaries
-                    if ufsize >= mingapsize or (unfillboundaries and (pos == buffersize or delstartpos == startpos)):
-                        uflist.append((bufferstart + delstartpos, ufsize))
-            except ValueError:
-                pass
-            index += 1
-            size -= maxpos
-            address += buffersize
-
-        for deladdr, delsize in uflist:
-            self.delete(deladdr, delsize)
+            startpos = max(address - bufferstart, 0)
+            runs = [(runstart, runstop) for runstart, runstop in
+                    patternruns(buffer, unfillpattern, startpos, min(endaddress - bufferstart, buffersize),
+                                blocksize, bufferstart)
+                    if runstop - runstart >= mingapsize or (unfillboundaries and (
+                        runstop == buffersize or runstart == startpos or
+                        (blocksize is not None and (bufferstart + runstart) % blocksize == 0)))]
+            if not runs:
+                newparts.append(parts[index])
+                continue
+            segments = []
+            pos = 0
+            for runstart, runstop in runs:
+                if runstart > pos:
+                    segments.append((pos, runstart))
+                pos = runstop
+            if pos < buffersize:
+                segments.append((pos, buffersize))
+            trailing = []
+            for segstart, segstop in segments:
+                if segstart == 0:
+                    continue
+                if isinstance(buffer, PagedBuffer):
+                    trailing.append([bufferstart + segstart, buffer.copy(segstart, segstop)])
+                else:
+                    trailing.append([bufferstart + segstart, buffer[segstart:segstop]])
+            if segments and segments[0][0] == 0:
+                # The part keeps its buffer for the first segment, trimmed in place
+                del self._writable(index)[segments[0][1]:]
+                newparts.append(parts[index])
+            newparts.extend(trailing)
+        newparts.extend(parts[last:])
+        self._parts[:] = newparts
+        self._reindex()
+        self._cursor = None
         return self
 
     def get(self, address, size, fillpattern=None):
@@ -461,49 +956,74 @@ class MultiPartBuffer(object):
         """
         address, size = self._checkaddrnsize(address, size)
         (index, mod) = self._find(address, size, create=False)
-        endaddress = address + size
-
-        retbuffer = bytearray()
-
-        if mod != 0:
+        if mod != MOD_USABLE_BUFFER_FOUND:
             return self._filler(size, fillpattern)
-        else:
-            bufferstart, buffer = self._parts[index]
-            bufferend = bufferstart + len(buffer)
 
-            if address < bufferstart:
-                before = bufferstart - address
-                retbuffer = self._filler(before, fillpattern)
-                size -= before
-                address += before
+        # Single forward sweep over all parts overlapping the range. Every gap is filled on its own, i.e. the fill
+        # pattern always starts at the beginning of a gap.
+        endaddress = address + size
+        retbuffer = bytearray(size)
+        parts = self._parts
+        numparts = len(parts)
+        pos = address
+        while index < numparts:
+            bufferstart, buffer = parts[index]
+            if bufferstart >= endaddress:
+                break
+            if bufferstart > pos:
+                retbuffer[pos - address:bufferstart - address] = self._filler(bufferstart - pos, fillpattern)
+                pos = bufferstart
+            stop = min(bufferstart + len(buffer), endaddress)
+            if stop > pos:
+                for offset, view in partviews(buffer, pos - bufferstart, stop - bufferstart):
+                    retbuffer[bufferstart + offset - address:bufferstart + offset - address + len(view)] = view
+                pos = stop
+            index += 1
+        if pos < endaddress:
+            retbuffer[pos - address:] = self._filler(endaddress - pos, fillpattern)
+        return retbuffer
 
-            pos = address - bufferstart
-            insize = min(size, bufferend - pos)
-            if insize > 0:
-                if len(retbuffer) > 0:
-                    retbuffer.extend(buffer[pos: pos + insize])
-                else:
-                    retbuffer = buffer[pos: pos + insize]
-                size -= insize
-                address += insize
+    def iterviews(self, address=None, size=None):
+        """Yield (address, memoryview) tuples for all parts overlapping the given range.
 
-            if endaddress > bufferend:
-                nextindex = index + 1
+           The memoryviews are read-only views into the part buffers, i.e. no data is copied. Gaps are skipped.
+           Note that a part buffer can't be resized while a view into it exists, so all views must be released
+           before the instance is modified.
 
-                nextbufferstart = None
-                if nextindex < len(self._parts):
-                    nextbufferstart = self._parts[nextindex][0]
-                # Check if data does not reach into next buffer
-                if nextbufferstart is None or nextbufferstart > endaddress:
-                    after = endaddress - bufferend
-                    retbuffer.extend(self._filler(after, fillpattern))
-                else:
-                    gap = nextbufferstart - bufferend
-                    retbuffer.extend(self._filler(gap, fillpattern))
-                    size -= gap
-                    address += gap
-                    retbuffer.extend(self.get(address, size, fillpattern))
-        return retbuffer
+           Args:
+             address (None or int): Start address of range. If None the start address of the instance is used.
+             size (None or int): Size of range. If None the remaining size to the end of the last part is used.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        endaddress = address + size
+        (index, mod) = self._find(address, size, create=False)
+        if mod != MOD_USABLE_BUFFER_FOUND:
+            return
+        for bufferstart, buffer in self._parts[index:]:
+            if bufferstart >= endaddress:
+                break
+            start = max(address, bufferstart)
+            stop = min(endaddress, bufferstart + len(buffer))
+            if stop > start:
+                for offset, view in partviews(buffer, start - bufferstart, stop - bufferstart):
+                    yield bufferstart + offset, view
+
+    def view(self, address, size, fillpattern=None):
+        """Return read-only memoryview of <size> bytes from <address>.
+
+           If the range lies inside a single part, the view points directly into the part buffer without copying.
+           Otherwise the range is read with :meth:`get` using the given fillpattern and a view of the result is
+           returned. See :meth:`iterviews` for the restrictions of views into part buffers.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        (index, mod) = self._find(address, size, create=False)
+        if mod == MOD_USABLE_BUFFER_FOUND:
+            bufferstart, buffer = self._parts[index]
+            if bufferstart <= address and address + size <= bufferstart + len(buffer):
+                views = list(partviews(buffer, address - bufferstart, address - bufferstart + size))
+                if len(views) == 1:
+                    return views[0][1]
+        return readonlyview(self.get(address, size, fillpattern))
 
     def range(self):
         """Get range of content as (start address, size) tuple. The range may contain unfilled gaps.
@@ -551,33 +1071,98 @@ class MultiPartBuffer(object):
         return gaplist
 
     def hasdata(self, address=None, size=None):
-        """Returns True if there is data in area (address, size)."""
-        address, size = self._checkaddrnsize(address, size)
-        index, mod = self._find(address, size, create=False)
-        # Check if there is a suitable buffer
-        if mod != MOD_USABLE_BUFFER_FOUND:
-            # No data if not
-            return False
-        # Otherwise the given address might be just at the end of the buffer.
-        # It hasdata only if the address is really inside the buffer span, not at the very end.
-        adr, data = self._parts[index]
-        return address < adr + len(data)
+        """Returns True if there is data in area (address, size).
 
-    def blockfilter(self, blocksize, filterfunc, address=None, size=None, skipempty=False):
-        """Execute op(address, blocksize) for each block of <blocksize>."""
+           A part which only touches the area, i.e. ends at <address> or starts at <address> + <size>, does not
+           count. This is the same criterion as used by :meth:`iterblocks` and :meth:`blockfilter` to skip empty
+           blocks.
+
+           Changed in v0.5.0: A part starting at <address> + <size> made earlier versions return True, while a part
+           starting inside the area after a gap at <address> was not detected. Both cases now follow the criterion
+           above.
+        """
         address, size = self._checkaddrnsize(address, size)
+        parts = self._parts
+        # Last part which starts at or before address; it has data in the area if it ends after address
+        index = bisect.bisect_right(self._starts, address) - 1
+        if index >= 0 and address < parts[index][0] + len(parts[index][1]):
+            return True
+        # Otherwise the next part must start inside the area
+        index += 1
+        return index < len(parts) and self._starts[index] < address + size
+
+    @staticmethod
+    def _checkblocksize(blocksize):
+        """Helper method: Return blocksize as int. Raises ValueError if it is not positive."""
         try:
             blocksize = int(blocksize)
             assert blocksize > 0
         except AssertionError:
             raise ValueError
+        return blocksize
+
+    def _blockaddresses(self, blocksize, address, endaddress):
+        """Yield the start addresses of all blocks aligned to <blocksize> which overlap the range address:endaddress
+           and contain data.
+
+           Empty blocks are skipped by looking up the next part after every block, so the cost depends on the
+           number of parts and data blocks, not on the size of the range. The lookup uses the current part list,
+           i.e. the instance may be modified between the steps as long as the data of later blocks is not changed.
+        """
+        blockaddress = (address // blocksize) * blocksize
+        while blockaddress < endaddress:
+            parts = self._parts
+            # First part which ends after the block start
+            index = bisect.bisect_right(self._starts, blockaddress) - 1
+            if index < 0 or parts[index][0] + len(parts[index][1]) <= blockaddress:
+                index += 1
+            if index == len(parts):
+                return
+            blockaddress = max(blockaddress, (parts[index][0] // blocksize) * blocksize)
+            if blockaddress >= endaddress:
+                return
+            yield blockaddress
+            blockaddress += blocksize
+
+    def iterblocks(self, blocksize, address=None, size=None, fillpattern=None):
+        """Yield (address, memoryview) tuples of all blocks aligned to <blocksize> which contain data.
+
+           Blocks without data are skipped without being looked at, so that e.g. a few parts in a large address
+           space can be streamed page by page. Every block is returned in full, even if it extends over the
+           given range, and missing bytes are filled with <fillpattern>. The views are obtained with :meth:`view`,
+           i.e. a block inside a single part is not copied. See :meth:`iterviews` for the restrictions of views.
+
+           Args:
+             blocksize (int): Size and alignment of the blocks.
+             address (None or int): Start address of range. If None the start address of the instance is used.
+             size (None or int): Size of range. If None the remaining size to the end of the last part is used.
+             fillpattern: Fill pattern for missing bytes, see :meth:`get`.
+
+           Raises:
+             ValueError: if blocksize is not positive.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        blocksize = self._checkblocksize(blocksize)
+        for blockaddress in self._blockaddresses(blocksize, address, address + size):
+            yield blockaddress, self.view(blockaddress, blocksize, fillpattern)
+
+    def blockfilter(self, blocksize, filterfunc, address=None, size=None, skipempty=False):
+        """Execute op(address, blocksize) for each block of <blocksize>.
+
+           If <skipempty> is True only blocks containing data are processed, which are found by walking the
+           part list, see :meth:`_blockaddresses`.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        blocksize = self._checkblocksize(blocksize)
         endaddress = address + size
-        # Align startaddress to blocksize
-        startaddress = int(address / blocksize) * blocksize
 
-        for addr in range(startaddress, endaddress, blocksize):
-            if not skipempty or self.hasdata(addr, blocksize):
-                filterfunc(self, addr, blocksize)
+        if skipempty:
+            blockaddresses = self._blockaddresses(blocksize, address, endaddress)
+        else:
+            # Align startaddress to blocksize
+            blockaddresses = range((address // blocksize) * blocksize, endaddress, blocksize)
+        for addr in blockaddresses:
+            filterfunc(self, addr, blocksize)
 
         return self
 
@@ -588,48 +1173,124 @@ class MultiPartBuffer(object):
         return self.blockfilter(blocksize, doblockfill, address, size, skipempty=True)
 
     def blockunfill(self, blocksize, address=None, size=None, unfillpattern=None, mingapsize=None, unfillboundaries=False):
-        """Unfill with <unfillpattern> blockwise with given <blocksize>."""
+        """Unfill with <unfillpattern> blockwise with given <blocksize>.
+
+           Every block aligned to <blocksize> which overlaps the given range is unfilled on its own, but all blocks
+           are processed in a single pass, see :meth:`_unfill`.
+        """
+        address, size = self._checkaddrnsize(address, size)
+        blocksize = self._checkblocksize(blocksize)
         if mingapsize is None:
             mingapsize = blocksize
-
-        def doblockunfill(inst, _address, _size):
-            inst.unfill(_address, _size, unfillpattern, mingapsize, unfillboundaries)
-        return self.blockfilter(blocksize, doblockunfill, address, size, skipempty=True)
+        startaddress = (address // blocksize) * blocksize
+        endaddress = -((-(address + size)) // blocksize) * blocksize
+        return self._unfill(startaddress, endaddress, unfillpattern, mingapsize, unfillboundaries, blocksize)
 
     def fillgaps(self, fillpattern=None):
-        """Fill all gaps with given fillpattern."""
-        for address, size in self.gaps():
-            self.fill(address, size, fillpattern)
+        """Fill all gaps with given fillpattern. The fill pattern starts anew at the beginning of every gap.
+
+           The result is built once: a single buffer of the total size is allocated, every part and every gap
+           filler is written into it and it replaces all parts. With paged storage the merged buffer is built by
+           appending instead and the pages of unshared parts are moved into it, so no contiguous copy of the whole
+           range is made. The filler is generated only once for the largest gap and sliced for all others, except
+           for random content which differs for every gap.
+        """
+        gaps = self.gaps()
+        if not gaps:
+            return self
+        fillpattern = self._fillpattern(fillpattern)
+        filler = None
+        if not isinstance(fillpattern, RandomContent):
+            filler = memoryview(fillpattern.tobytes(0, max(size for address, size in gaps)))
+
+        def gapfiller(size):
+            if filler is None:
+                return fillpattern.tobytes(0, size)
+            return filler[0:size]
+
+        start, totalsize = self.range()
+        if self._pagesize is not None:
+            buffer = self._newbuffer(start)
+            for address, part in self._parts:
+                size = address - start - len(buffer)
+                if size > 0:
+                    buffer.extend(gapfiller(size))
+                if isinstance(part, PagedBuffer) and id(part) not in self._shared:
+                    buffer.adopt(part)
+                else:
+                    buffer.extend(part)
+        else:
+            buffer = bytearray(totalsize)
+            for address, part in self._parts:
+                for offset, view in partviews(part, 0, len(part)):
+                    buffer[address + offset - start:address + offset - start + len(view)] = view
+            for address, size in gaps:
+                buffer[address - start:address - start + size] = gapfiller(size)
+        self._parts[:] = [[start, buffer]]
+        self._reindex()
+        self._shared = set()
+        self._cursor = None
         return self
 
     def fillfront(self, startaddress=0, fillpattern=None):
         """Fill the data range in front starting from the given address (0 by default)
            to the beginning of the buffer.
+
+           The first part is copied once behind the filler, or prepended to if it uses paged storage.
         """
         if len(self._parts) > 0:
-            endaddress = self._parts[0][0]
+            endaddress, buffer = self._parts[0]
             size = endaddress - startaddress
             if size > 0:
-                self.fill(startaddress, size, fillpattern)
+                filler = self._filler(size, fillpattern)
+                if isinstance(buffer, PagedBuffer):
+                    self._writable(0).prepend(filler)
+                else:
+                    filler.extend(buffer)
+                    self._parts[0][1] = filler
+                self._move(0, startaddress)
         return self
 
     def fillend(self, endaddress, fillpattern=None):
         """Fill the data range after the buffer up to the given address.
+
+           The filler is appended to the last part in place.
         """
         (startaddress, totalsize) = self.range()
         startaddress += totalsize
         size = endaddress - startaddress
         if size > 0:
-            self.fill(startaddress, size, fillpattern)
+            if self._parts:
+                self._extend(len(self._parts) - 1, self._filler(size, fillpattern), size, 0)
+            else:
+                self.fill(startaddress, size, fillpattern)
         return self
 
-    def tobinfile(self, filename, address=None, size=None, fillpattern=None):
-        """ """
+    def tobinfile(self, filename, address=None, size=None, fillpattern=None, sparse=False):
+        """Write content as binary file. See :meth:`tobinfh` for the arguments."""
         with open(filename, "wb") as fh:
-            return self.tobinfh(fh, address, size, fillpattern)
+            return self.tobinfh(fh, address, size, fillpattern, sparse)
 
-    def tobinfh(self, fh, address=None, size=None, fillpattern=None):
-        """ """
+    def tobinfh(self, fh, address=None, size=None, fillpattern=None, sparse=False):
+        """Write content as binary data to file handle. Gaps are filled using <fillpattern>.
+
+           The data is streamed to the file handle, i.e. the parts are written directly from their buffers and
+           the fill data of gaps is generated in chunks of at most WRITE_CHUNKSIZE bytes. No padded image of
+           the whole range is built in memory.
+
+           Args:
+             fh (file handle or compatible): Binary destination.
+             address (None or int): Start address. If None the start address of the instance is used.
+             size (None or int): Size of written range. If None the range up to the end of the instance is used.
+             fillpattern: Fill pattern for gaps, see :meth:`get`. If None the standard padding is used.
+             sparse (bool): If True and the fill pattern only consists of zero bytes, gaps are skipped by seeking
+                            instead of writing them. On file systems which support it this produces holes in the
+                            file. The file handle must be seekable and the skipped range must not contain other
+                            data, i.e. it should be a newly created file.
+
+           Returns:
+             self
+        """
         start, esize = self.range()
         if address is not None:
             if address < 0:
@@ -641,19 +1302,60 @@ class MultiPartBuffer(object):
                 esize = 0
         if size is None:
             size = esize
-        fh.write(self.get(start, size, fillpattern))
+        pos = start
+        for partaddress, view in self.iterviews(start, size):
+            if partaddress > pos:
+                self._writegap(fh, partaddress - pos, fillpattern, sparse)
+            fh.write(view)
+            pos = partaddress + len(view)
+        if start + size > pos:
+            self._writegap(fh, start + size - pos, fillpattern, sparse, last=True)
         return self
 
+    def _writegap(self, fh, size, fillpattern, sparse=False, last=False):
+        """Write gap of given size to file handle. Helper method for :meth:`tobinfh`.
+
+           If sparse is True and the fill pattern is all zero the gap is skipped using a relative seek. For the
+           last gap only the final byte is written after the seek, so that the file gets its full size.
+        """
+        if sparse and self._fillpattern(fillpattern).iszero():
+            if last:
+                fh.seek(size - 1, 1)
+                fh.write(b'\x00')
+            else:
+                fh.seek(size, 1)
+            return
+        for chunk in self._iterfiller(size, fillpattern):
+            fh.write(chunk)
+
     def todict(self):
-        """Return a dictionary with a numeric key for all used bytes like intelhex.IntelHex does it."""
-        d = {addr: byte for address, buffer in self._parts for addr, byte in enumerate(buffer, address)}
+        """Return a dictionary with a numeric key for all used bytes like intelhex.IntelHex does it.
+
+           See :meth:`dictview` for a view which does not copy the data into a dictionary.
+        """
+        d = dict()
+        for address, buffer in self._parts:
+            d.update(zip(range(address, address + len(buffer)), buffer))
         return d
 
+    def dictview(self):
+        """Return a read-only mapping view with a numeric key for all used bytes, like :meth:`todict` but without
+           building a dictionary. The view reflects later changes of the instance."""
+        return ByteMapping(self)
+
     def loaddict(self, d, overwrite=True):
         """Load data from dictionary where each key must be numeric and represent an address and the corresponding \
-        value the byte value."""
-        for addr, byte in d.items():
-            self.set(addr, (byte,), 1, overwrite=overwrite)
+        value the byte value.
+
+           The keys are sorted once and every run of consecutive addresses is set as one block.
+        """
+        keys = sorted(d)
+        getbyte = d.__getitem__
+        start = 0
+        for pos in range(1, len(keys) + 1):
+            if pos == len(keys) or keys[pos] != keys[pos - 1] + 1:
+                self.set(keys[start], bytearray(map(getbyte, keys[start:pos])), overwrite=overwrite)
+                start = pos
         return self
 
     def __iadd__(self, other):
@@ -698,6 +1400,9 @@ class MultiPartBuffer(object):
 
     def add(self, other, overwrite=True):
         """Add content of other instance to itself, overwriting or keeping existing data if parts overlap.
+
+           If other is a MultiPartBuffer both part lists are merged in a single sweep using :func:`mergeparts`.
+           The buffers of unchanged parts of this instance are kept, all other parts are built directly.
             
            Args:
              other (MultiPartBuffer, dict or iterable): Second summand.
@@ -706,8 +1411,15 @@ class MultiPartBuffer(object):
              overwrite (bool): If True existing data will be overwritten if parts overlap.
         """
         if isinstance(other, MultiPartBuffer):
-            source = other._parts
-        elif isinstance(other, dict):
+            newbuffer = None if self._pagesize is None else self._newbuffer
+            if overwrite:
+                self._parts[:] = mergeparts((self._parts, other._parts), owned=0, newbuffer=newbuffer)
+            else:
+                self._parts[:] = mergeparts((other._parts, self._parts), owned=1, newbuffer=newbuffer)
+            self._reindex()
+            self._cursor = None
+            return self
+        if isinstance(other, dict):
             source = iter(other.items())
         else:
             source = other
@@ -718,9 +1430,50 @@ class MultiPartBuffer(object):
             raise TypeError(e)
         return self
 
+    @classmethod
+    def merge_all(cls, images, overwrite=True):
+        """Merge several images into a new instance in a single sweep over all part lists.
+
+           Args:
+             images (iterable): Images to be merged. Each is a MultiPartBuffer, dict or iterable as accepted
+                                by :meth:`add`.
+             overwrite (bool): If True data of later images overwrites data of earlier ones where they overlap,
+                               otherwise the data of the earlier image is kept.
+
+           Returns:
+             New instance with the combined data of all images.
+        """
+        partlists = []
+        for image in images:
+            if not isinstance(image, MultiPartBuffer):
+                image = MultiPartBuffer().add(image)
+            partlists.append(image._parts)
+        if not overwrite:
+            partlists.reverse()
+        self = cls()
+        self._parts = mergeparts(partlists)
+        self._reindex()
+        return self
+
     def copy(self):
-        """Return a deep copy of the instance."""
-        return copy.deepcopy(self)
+        """Return a copy of the instance.
+
+           The part buffers are shared copy-on-write, i.e. a buffer is only duplicated when it is modified in
+           either instance. All other attributes are deep copied.
+        """
+        parts = self._copyparts()
+        memo = {id(self._parts): parts}
+        for part, newpart in zip(self._parts, parts):
+            memo[id(part)] = newpart
+            memo[id(part[1])] = part[1]
+        new = copy.deepcopy(self, memo)
+        new._shared = set(self._shared)
+        return new
+
+    def _emptycopy(self):
+        """Return a copy of the instance without any parts. All other attributes are deep copied."""
+        memo = {id(self._parts): PartList(), id(self._starts): [], id(self._shared): set(), id(self._cursor): None}
+        return copy.deepcopy(self, memo)
 
     def filter(self, filterfunc, address=None, size=None, fillpattern=None):
         """Call filterfunc(bufferaddr, buffer, bufferstartindex, buffersize) on all parts matching <address> and <size>.
@@ -741,7 +1494,9 @@ class MultiPartBuffer(object):
         (lastindex, mod2) = self._find(endaddress - 1, 0, create=False)
         if mod2 == MOD_NO_BUFFER_FOUND_NEXT_HIGHER_USED:
             lastindex -= 1
-        for bufferaddr, buffer in self._parts[startindex:lastindex + 1]:
+        for index in range(startindex, lastindex + 1):
+            bufferaddr = self._parts[index][0]
+            buffer = self._writable(index)
             bufferstartindex = max(address - bufferaddr, 0)
             bufferendindex = min(len(buffer), endaddress - bufferaddr)
             filterfunc(bufferaddr, buffer, bufferstartindex, bufferendindex)
@@ -809,10 +1564,11 @@ class MultiPartBuffer(object):
         return self
 
     @classmethod
-    def frombinfile(cls, filename, address=0, size=-1, offset=0):
-        """ """
-        with open(filename, "rb") as fh:
-            return cls.frombinfh(fh, address, size, offset)
+    def frombinfile(cls, filename, address=0, size=-1, offset=0, usemmap=False):
+        """Generate instance from binary file. See :meth:`loadbinfile` for the arguments."""
+        self = cls()
+        self.loadbinfile(filename, address, size, offset, usemmap)
+        return self
 
     @classmethod
     def frombinfh(cls, fh, address=0, size=-1, offset=0):
@@ -825,11 +1581,39 @@ class MultiPartBuffer(object):
         """ """
         if offset != 0:
             fh.seek(offset, (offset < 0) and 2 or 0)
-        buffer = bytearray(fh.read(size))
-        self.set(address, buffer)
+        self.set(address, fh.read(size))
         return self
 
-    def loadbinfile(self, filename, address=0, size=-1, offset=0):
-        """ """
+    def loadbinfile(self, filename, address=0, size=-1, offset=0, usemmap=False):
+        """Load binary file content to given address.
+
+           Args:
+             filename (str): Name of binary file.
+             address (int): Address of first byte read from file.
+             size (int): Number of bytes to read. If negative all bytes to the end of the file are read.
+             offset (int): Read offset in file. Negative values are relative to the end of the file.
+             usemmap (bool): If True the file is memory mapped and the content is copied from the mapping directly
+                             into the part buffer. This avoids the intermediate copy of a normal read and so keeps
+                             the peak memory at the size of the data for large files.
+
+           Returns:
+             self
+        """
         with open(filename, "rb") as fh:
-            return self.loadbinfh(fh, address, size, offset)
+            if not usemmap:
+                return self.loadbinfh(fh, address, size, offset)
+            fh.seek(0, 2)
+            filesize = fh.tell()
+            if offset < 0:
+                offset = max(0, filesize + offset)
+            if size < 0 or offset + size > filesize:
+                size = max(0, filesize - offset)
+            if size == 0:
+                return self
+            mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with memoryview(mapping) as view:
+                    self.set(address, view[offset:offset + size])
+            finally:
+                mapping.close()
+        return self
@@ -0,0 +1,350 @@
+""" Provide paged byte buffer used as alternative part storage by :class:`hexformat.multipartbuffer.MultiPartBuffer`.
+
+  A :class:`PagedBuffer` stores its content in fixed-size pages instead of a single contiguous bytearray.
+  Prepending, splitting, truncating and concatenating such buffers only touches the pages at the affected
+  positions instead of copying the whole content.
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+
+DEFAULT_PAGESIZE = 4096
+
+
+def readonlyview(buffer):
+    """Return read-only memoryview of given buffer."""
+    view = memoryview(buffer)
+    try:
+        return view.toreadonly()
+    except AttributeError:  # Python < 3.8
+        return view
+
+
+def byteview(data):
+    """Return memoryview of bytes of given data. Data without buffer interface is converted to a bytearray first."""
+    try:
+        return memoryview(data).cast('B')
+    except TypeError:
+        return memoryview(bytearray(data))
+
+
+class PagedBuffer(object):
+    """Mutable byte buffer stored in pages of fixed size.
+
+       The pages are aligned to a virtual page grid: the first page covers the positions from <head> to the end of
+       its virtual page, all further pages start at a page boundary. Only the first and the last page can be shorter
+       than the page size. If the head offset is set to the start address of the data modulo the page size, the
+       pages are aligned to the address space and two buffers of adjacent address ranges can be concatenated by
+       moving their pages with :meth:`adopt`.
+
+       The buffer supports the bytearray operations used by MultiPartBuffer: len(), iteration, indexing and
+       slicing (slices are returned as bytearray), slice assignment, slice deletion, extend(), index(),
+       startswith(), comparison and copy().
+
+       Args:
+         data (Buffer or iterable): Initial content.
+         pagesize (int): Size of each page in bytes.
+         head (int): Offset of the first byte in its virtual page. Taken modulo pagesize.
+    """
+
+    __hash__ = None
+
+    def __init__(self, data=b'', pagesize=DEFAULT_PAGESIZE, head=0):
+        pagesize = int(pagesize)
+        if pagesize < 1:
+            raise ValueError("pagesize must be positive")
+        self._pagesize = pagesize
+        self._head = int(head) % pagesize
+        self._pages = []
+        self._length = 0
+        self.extend(data)
+
+    @property
+    def pagesize(self):
+        return self._pagesize
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return "<{:s} of {:d} bytes in {:d} pages of {:d} bytes>".format(self.__class__.__name__, self._length,
+                                                                         len(self._pages), self._pagesize)
+
+    def __iter__(self):
+        for page in self._pages:
+            for byte in page:
+                yield byte
+
+    def __bytes__(self):
+        return b''.join(self._pages)
+
+    def __eq__(self, other):
+        if isinstance(other, PagedBuffer):
+            other = other[:]
+        return self[:] == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def _locate(self, pos):
+        """Return (page index, offset in page) of position 0 <= pos < len(self)."""
+        virtual = self._head + pos
+        index = virtual // self._pagesize
+        if index == 0:
+            return 0, pos
+        return index, virtual - index * self._pagesize
+
+    def _indices(self, start, stop):
+        """Return (start, stop) of slice clipped to the buffer, with stop >= start."""
+        start, stop, step = slice(start, stop).indices(self._length)
+        return start, max(start, stop)
+
+    def _bounds(self, start, end):
+        """Return (start, end) of search range like bytearray.find(), i.e. start is not clipped to the length."""
+        length = self._length
+        if start is None:
+            start = 0
+        elif start < 0:
+            start = max(0, start + length)
+        if end is None or end > length:
+            end = length
+        elif end < 0:
+            end = max(0, end + length)
+        return start, end
+
+    def views(self, start=0, stop=None):
+        """Yield (position, read-only memoryview) tuples of the page data covering the range start:stop."""
+        pos, stop = self._indices(start, stop)
+        while pos < stop:
+            index, offset = self._locate(pos)
+            page = self._pages[index]
+            size = min(len(page) - offset, stop - pos)
+            yield pos, readonlyview(page)[offset:offset + size]
+            pos += size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step is not None and key.step != 1:
+                return self[:][key]
+            return bytearray().join([view for pos, view in self.views(key.start, key.stop)])
+        key = int(key)
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("PagedBuffer index out of range")
+        index, offset = self._locate(key)
+        return self._pages[index][offset]
+
+    def __setitem__(self, key, value):
+        if not isinstance(key, slice):
+            key = int(key)
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError("PagedBuffer index out of range")
+            index, offset = self._locate(key)
+            self._pages[index][offset] = value
+            return
+        if key.step is not None and key.step != 1:
+            content = self[:]
+            content[key] = value
+            self._replace(content)
+            return
+        start, stop = self._indices(key.start, key.stop)
+        data = byteview(value)
+        if len(data) != stop - start:
+            tail = self.split(stop)
+            del self[start:]
+            self.extend(data)
+            self.adopt(tail)
+            return
+        pos = start
+        while pos < stop:
+            index, offset = self._locate(pos)
+            page = self._pages[index]
+            size = min(len(page) - offset, stop - pos)
+            page[offset:offset + size] = data[pos - start:pos - start + size]
+            pos += size
+
+    def __delitem__(self, key):
+        if not isinstance(key, slice):
+            key = int(key)
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError("PagedBuffer index out of range")
+            key = slice(key, key + 1)
+        if key.step is not None and key.step != 1:
+            content = self[:]
+            del content[key]
+            self._replace(content)
+            return
+        start, stop = self._indices(key.start, key.stop)
+        if start == stop:
+            return
+        if stop == self._length:
+            self.split(start)
+        elif start == 0:
+            tail = self.split(stop)
+            self._pages = tail._pages
+            self._head = tail._head
+            self._length = tail._length
+        else:
+            tail = self.split(stop)
+            self.split(start)
+            self.adopt(tail)
+
+    def _replace(self, content):
+        """Replace whole content, keeping the head offset."""
+        self._pages = []
+        self._length = 0
+        self.extend(content)
+
+    def copy(self, start=0, stop=None):
+        """Return independent copy of the range start:stop (default: all) with copied pages."""
+        start, stop = self._indices(start, stop)
+        new = PagedBuffer(pagesize=self._pagesize, head=self._head + start)
+        for pos, view in self.views(start, stop):
+            new._append(view)
+        return new
+
+    def extend(self, data):
+        """Append data by copying it into the pages."""
+        if isinstance(data, PagedBuffer):
+            for pos, view in data.views():
+                self._append(view)
+        else:
+            self._append(byteview(data))
+
+    def _append(self, view):
+        size = len(view)
+        if size == 0:
+            return
+        pagesize = self._pagesize
+        if self._pages:
+            pos = min((-(self._head + self._length)) % pagesize, size)
+            self._pages[-1].extend(view[0:pos])
+        else:
+            pos = min(pagesize - self._head, size)
+            self._pages.append(bytearray(view[0:pos]))
+        while pos < size:
+            self._pages.append(bytearray(view[pos:pos + pagesize]))
+            pos += pagesize
+        self._length += size
+
+    def prepend(self, data):
+        """Insert data in front of the content. Only the first page and the new pages are written."""
+        view = byteview(data)
+        size = len(view)
+        if size == 0:
+            return
+        pagesize = self._pagesize
+        if not self._pages:
+            self._head = (self._head - size) % pagesize
+            self._append(view)
+            return
+        infirst = min(self._head, size)
+        if infirst:
+            self._pages[0][0:0] = view[size - infirst:size]
+            self._head -= infirst
+        remaining = size - infirst
+        if remaining:
+            first = remaining % pagesize or pagesize
+            newpages = [bytearray(view[0:first])]
+            for pos in range(first, remaining, pagesize):
+                newpages.append(bytearray(view[pos:pos + pagesize]))
+            self._pages[0:0] = newpages
+            self._head = (pagesize - first) % pagesize
+        self._length += size
+
+    def split(self, pos):
+        """Remove the content from <pos> to the end and return it as new PagedBuffer.
+
+           The pages after the split position are moved to the new buffer, only the page at the split position
+           is copied partially.
+        """
+        pos, stop = self._indices(pos, None)
+        tail = PagedBuffer(pagesize=self._pagesize, head=self._head + pos)
+        if pos == self._length:
+            return tail
+        index, offset = self._locate(pos)
+        if offset == 0:
+            tail._pages = self._pages[index:]
+            del self._pages[index:]
+        else:
+            tail._pages = [self._pages[index][offset:]] + self._pages[index + 1:]
+            del self._pages[index][offset:]
+            del self._pages[index + 1:]
+        tail._length = self._length - pos
+        self._length = pos
+        return tail
+
+    def adopt(self, other):
+        """Append content of other PagedBuffer and empty it.
+
+           If the pages of other continue the page grid of this buffer they are moved instead of copied.
+        """
+        if not isinstance(other, PagedBuffer) or other._pagesize != self._pagesize or \
+                (self._head + self._length) % self._pagesize != other._head:
+            self.extend(other)
+        elif other._pages:
+            pages = other._pages
+            if self._pages and (self._head + self._length) % self._pagesize:
+                self._pages[-1].extend(pages[0])
+                pages = pages[1:]
+            self._pages.extend(pages)
+            self._length += other._length
+        other._pages = []
+        other._length = 0
+
+    def find(self, sub, start=0, end=None):
+        """Return lowest position of sub in the range start:end or -1 if not found."""
+        sub = bytes(byteview(sub)) if not isinstance(sub, int) else bytes((sub,))
+        start, end = self._bounds(start, end)
+        if not sub:
+            return start if start <= end else -1
+        carry = b''
+        carrypos = start
+        for pos, view in self.views(start, end):
+            window = carry + view.tobytes()
+            found = window.find(sub)
+            if found >= 0:
+                return carrypos + found
+            keep = min(len(window), len(sub) - 1)
+            carry = window[len(window) - keep:]
+            carrypos = pos + len(view) - keep
+        return -1
+
+    def index(self, sub, start=0, end=None):
+        """Like :meth:`find` but raises ValueError if sub is not found."""
+        pos = self.find(sub, start, end)
+        if pos < 0:
+            raise ValueError("subsection not found")
+        return pos
+
+    def startswith(self, prefix, start=0, end=None):
+        """Return True if the range start:end starts with prefix."""
+        prefix = byteview(prefix)
+        start, end = self._bounds(start, end)
+        if end - start < len(prefix):
+            return False
+        return self[start:start + len(prefix)] == prefix
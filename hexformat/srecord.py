@@ -24,8 +24,10 @@
 """
 
 import binascii
+import itertools
 
-from hexformat.base import DecodeError, EncodeError, HexFormat
+from hexformat import checksum
+from hexformat.base import PARALLEL_ENCODESIZE, DecodeError, EncodeError, HexFormat, partslices, readlineblocks
 
 BYTESPERLINE_MAX = 253
 
@@ -52,6 +54,21 @@ class RECORD_TYPE(object):
     FOOTER_16 = S9
 
 
+def _countsrecdata(filename, start, stop):
+    """Return the number of data records (S1, S2 or S3 lines) in the byte range start:stop of the named file.
+       Used to pre-scan the chunks of a file loaded in parallel, see :meth:`SRecord.loadsrecfile`.
+    """
+    with open(filename, "rb") as fh:
+        fh.seek(start)
+        raw = fh.read(stop - start)
+    # Lines end with \n or \r\n, the start codes after a single \r are only counted if there are any
+    separators = (b'\n', b'\r') if b'\rS' in raw else (b'\n',)
+    count = 0
+    for code in (b'S1', b'S2', b'S3'):
+        count += sum(raw.count(separator + code) for separator in separators) + raw.startswith(code)
+    return count
+
+
 class SRecord(HexFormat):
     """Motorola `S-Record`_ hex file representation class.
 
@@ -176,11 +193,16 @@ class SRecord(HexFormat):
             return self.tosrecfh(fh, **settings)
 
     # noinspection PyIncorrectDocstring
-    def tosrecfh(self, fh, **settings):
+    def tosrecfh(self, fh, workers=None, **settings):
         """Writes content as S-Record file to given file handle.
 
+           If <workers> is larger than 1 the parts are split into slices of whole records of about
+           PARALLEL_ENCODESIZE bytes which are encoded in parallel worker processes and written in address order.
+           The number of data records written as record type 5 or 6 is the sum of the numbers of all slices.
+
            Args:
              fh (file handle or compatible): Destination of S-Record lines.
+             workers (None or int): Number of worker processes. If None or 1 the data is encoded sequentially.
              bytesperline (int): Number of data bytes per line.
              addresslength (None or int in range 2..4): Address length in bytes. This determines the used file format
                     variant. If None then the shortest possible address length large enough to encode the highest
@@ -204,8 +226,15 @@ class SRecord(HexFormat):
 
         if header:
             self._encodesrecline(fh, RECORD_TYPE.HEADER, 0, header, BYTESPERLINE_MAX)
-        for address, buffer in self._parts:
-            numdatarecords += self._encodesrecline(fh, recordtype, address, buffer, bytesperline)
+        if workers is not None and workers > 1:
+            # Split at whole records of the length used by _encodesrecline
+            recordsize = max(1, min(bytesperline, 254 - addresslength))
+            tasks = ((recordtype, address, data, bytesperline)
+                     for address, data in partslices(self._parts, PARALLEL_ENCODESIZE, recordsize))
+            numdatarecords = sum(self._saveparallel(fh, workers, '_encodesrecline', tasks))
+        else:
+            for address, buffer in self._parts:
+                numdatarecords += self._encodesrecline(fh, recordtype, address, buffer, bytesperline)
         if write_number_of_records:
             if numdatarecords <= 0xFFFF:
                 self._encodesrecline(fh, RECORD_TYPE.COUNT_16, numdatarecords, bytearray(), BYTESPERLINE_MAX)
@@ -270,7 +299,8 @@ class SRecord(HexFormat):
         """Encode given data to a S-Record line.
 
            One or more S-Record lines are encoded from the given address and buffer and written to the given
-           file handle.
+           file handle. The checksums of the data of all lines are computed as batch using
+           :func:`hexformat.checksum.blocksums`.
 
            Args:
              fh (file handle or compatible): Destination of S-Record lines.
@@ -292,6 +322,7 @@ class SRecord(HexFormat):
 
         bytesperline = max(1, min(bytesperline, 254 - addresslength))
         bytecount = bytesperline + addresslength + 1
+        datasums = checksum.blocksums(buffer, bytesperline)
         numdatarecords = 0
         pos = 0
         while address < endaddress or numdatarecords == 0:
@@ -303,7 +334,8 @@ class SRecord(HexFormat):
             linebuffer[0] = bytecount
             linebuffer[1:addresslength + 1] = cls._s123addr(addresslength, address)
             linebuffer[addresslength + 1:bytecount] = buffer[pos:pos + bytesperline]
-            linebuffer[bytecount] = ((~sum(linebuffer)) & 0xFF)
+            datasum = datasums[numdatarecords - 1] if pos < len(buffer) else 0
+            linebuffer[bytecount] = ((~(sum(linebuffer[0:addresslength + 1]) + datasum)) & 0xFF)
             line = "".join(["S", str(recordtype), binascii.hexlify(linebuffer).upper().decode(), "\n"])
             fh.write(line)
             pos += bytesperline
@@ -345,19 +377,23 @@ class SRecord(HexFormat):
         return recordtype, address, data, datasize, crccorrect
 
     @classmethod
-    def fromsrecfile(cls, filename, raise_error_on_miscount=True):
+    def fromsrecfile(cls, filename, raise_error_on_miscount=True, workers=None):
         """Generates SRecord instance from S-Record file.
 
-           Opens filename for reading and calls :meth:`fromsrecfh` with the file handle.
+           Opens filename for reading and calls :meth:`fromsrecfh` with the file handle. If <workers> is larger
+           than 1 the file is loaded in parallel instead, see :meth:`loadsrecfile`.
 
            Args:
              filename (str): Name of S-Record file.
              raise_error_on_miscount (bool): If True a DecodeError is raised if the number of records read differs from
                                              stored number of records.
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              New instance of class with loaded data.
         """
+        if workers is not None and workers > 1:
+            return cls().loadsrecfile(filename, raise_error_on_miscount=raise_error_on_miscount, workers=workers)
         with open(filename, "r") as fh:
             return cls.fromsrecfh(fh, raise_error_on_miscount)
 
@@ -379,10 +415,17 @@ class SRecord(HexFormat):
         self.loadsrecfh(fh, raise_error_on_miscount=raise_error_on_miscount)
         return self
 
-    def loadsrecfile(self, filename, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True):
+    def loadsrecfile(self, filename, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True,
+                     workers=None):
         """Loads S-Record lines from named file.
 
-           Creates new instance and calls :meth:`loadsrecfh` on it.
+           Opens filename for reading and calls :meth:`loadsrecfh` with the file handle.
+
+           If <workers> is larger than 1 the file is split at line boundaries into chunks which are decoded in
+           parallel by that many worker processes, see :meth:`_loadparallel`. The data records of every chunk are
+           counted first, so that each worker knows the number of data records before its chunk. Therefore the
+           record count validation and the metadata taken from the first data record are the same as for sequential
+           loading.
 
            Args:
              filename (str): Name of S-Record file.
@@ -390,10 +433,19 @@ class SRecord(HexFormat):
              overwrite_data (bool): If True existing data will be overwritten.
              raise_error_on_miscount (bool): If True a DecodeError is raised if the number of records read differs from
                                              stored number of records.
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              self
         """
+        if workers is not None and workers > 1:
+            self._loadparallel(filename, workers, '_loadsrecblocks',
+                               (overwrite_metadata, overwrite_data, raise_error_on_miscount), _countsrecdata, (0,),
+                               lambda state, count: (state[0] + count,), overwrite_data, overwrite_metadata,
+                               None if overwrite_metadata else self._emptycopy())
+            if self._write_number_of_records is None:
+                self.write_number_of_records = False
+            return self
         with open(filename, "r") as fh:
             return self.loadsrecfh(fh, overwrite_metadata, overwrite_data, raise_error_on_miscount)
 
@@ -418,9 +470,27 @@ class SRecord(HexFormat):
              DecodeError: If raise_error_on_miscount is True and number of records read differ from stored number of
                           records.
         """
-        line = fh.readline()
-        numdatarecords = 0
-        while line != '':
+        self._loadsrecblocks(readlineblocks(fh), overwrite_metadata, overwrite_data, raise_error_on_miscount)
+        if self._write_number_of_records is None:
+            self.write_number_of_records = False
+        return self
+
+    def _loadsrecblocks(self, blocks, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True,
+                        numdatarecords=0):
+        """Load blocks of S-Record lines as yielded by :func:`hexformat.base.readlineblocks`.
+
+           Args:
+             blocks (iterable): Lists of S-Record lines.
+             overwrite_metadata (bool): If True existing metadata will be overwritten.
+             overwrite_data (bool): If True existing data will be overwritten.
+             raise_error_on_miscount (bool): If True a DecodeError is raised if the number of records read differs from
+                                             stored number of records.
+             numdatarecords (int): Number of data records read before the first line.
+
+           Returns:
+             False, as S-Record files have no end of file record.
+        """
+        for line in itertools.chain.from_iterable(blocks):
             (recordtype, address, data, datasize, crccorrect) = self.__class__._parsesrecline(line)
             if 1 <= recordtype <= 3:
                 self.set(address, data, datasize, overwrite=overwrite_data)
@@ -445,7 +515,11 @@ class SRecord(HexFormat):
                     self.startaddress = address
             else:
                 raise DecodeError("Unsupported record type " + str(recordtype))
-            line = fh.readline()
-        if self._write_number_of_records is None:
-            self.write_number_of_records = False
-        return self
+        return False
+
+    def _mergemetadata(self, other, overwrite_metadata=False):
+        """Take over the metadata of an instance loaded from a later part of the same file."""
+        for name in ('_bytesperline', '_addresslength', '_header', '_write_number_of_records', '_startaddress'):
+            value = getattr(other, name)
+            if value is not None and (overwrite_metadata or getattr(self, name) is None):
+                setattr(self, name, value)
@@ -24,13 +24,29 @@
 """
 
 import binascii
+import itertools
+import re
 
-from hexformat.base import HexFormat, DecodeError
+from hexformat import checksum
+from hexformat.base import PARALLEL_ENCODESIZE, HexFormat, DecodeError, partslices, readlineblocks
 
 TYPE_SYMBOL = 3
 TYPE_DATA = 6
 TYPE_TERMINATOR = 8
 
+# Data records at the start of a line
+_DATARECORD = re.compile(br'[\r\n]%[^\r\n]{2}6')
+
+
+def _counttekdata(filename, start, stop):
+    """Return the number of data records in the byte range start:stop of the named file. Used to pre-scan the
+       chunks of a file loaded in parallel, see :meth:`TektronixExtHex.loadtekfile`.
+    """
+    with open(filename, "rb") as fh:
+        fh.seek(start)
+        raw = fh.read(stop - start)
+    return len(_DATARECORD.findall(raw)) + (raw[0:1] == b'%' and raw[3:4] == b'6')
+
 
 class TektronixExtHex(HexFormat):
     """Tektronix Extended Hex file representation class.
@@ -42,9 +58,9 @@ class TektronixExtHex(HexFormat):
     """
 
     _STANDARD_FORMAT = 'tek'
-    _STANDARD_STARTADDRESS = 0
-    _STANDARD_ADDRESSLENGTH = None
-    _STANDARD_BYTESPERLINE = 32
+    _DEFAULT_STARTADDRESS = 0
+    _DEFAULT_ADDRESSLENGTH = None
+    _DEFAULT_BYTESPERLINE = 32
     _SETTINGS = ['startaddress', 'bytesperline', 'addresslength']
 
     def __init__(self, **settings):
@@ -98,8 +114,8 @@ class TektronixExtHex(HexFormat):
     def _parse_addresslength(addresslength):
         if addresslength is not None:
             addresslength = int(addresslength)
-            if addresslength < 2 or addresslength > 4:
-                raise ValueError("addresslength must be 2, 3 or 4 bytes")
+            if addresslength < 1 or addresslength > 15:
+                raise ValueError("addresslength must be between 1 and 15 digits")
         return addresslength
 
     def totekfile(self, filename, **settings):
@@ -114,11 +130,15 @@ class TektronixExtHex(HexFormat):
         with open(filename, "w") as fh:
             return self.totekfh(fh, **settings)
 
-    def totekfh(self, fh, **settings):
+    def totekfh(self, fh, workers=None, **settings):
         """Writes content as Tektronix Extended Hex file to given file handle.
 
+           If <workers> is larger than 1 the parts are split into slices of whole records of about
+           PARALLEL_ENCODESIZE bytes which are encoded in parallel worker processes and written in address order.
+
            Args:
              fh (file handle or compatible): Destination of Tektronix Extended Hex lines.
+             workers (None or int): Number of worker processes. If None or 1 the data is encoded sequentially.
              settings: 
 
            Returns:
@@ -131,8 +151,15 @@ class TektronixExtHex(HexFormat):
             endaddress = start + size - 1
             addresslength = len("{:X}".format(endaddress))
 
-        for address, buffer in self._parts:
-            self._encodetekline(fh, address, addresslength, buffer, 0, TYPE_DATA, bytesperline)
+        if workers is not None and workers > 1:
+            # Split at whole records of the length used by _encodetekline
+            recordsize = max(1, min(bytesperline, ((255 - 6 - addresslength) // 2)))
+            tasks = ((address, addresslength, data, 0, TYPE_DATA, bytesperline)
+                     for address, data in partslices(self._parts, PARALLEL_ENCODESIZE, recordsize))
+            self._saveparallel(fh, workers, '_encodetekline', tasks)
+        else:
+            for address, buffer in self._parts:
+                self._encodetekline(fh, address, addresslength, buffer, 0, TYPE_DATA, bytesperline)
 
         self._encodetekline(fh, startaddress, addresslength, bytearray(), recordtype=TYPE_TERMINATOR, bytesperline=0)
         return self
@@ -142,7 +169,8 @@ class TektronixExtHex(HexFormat):
         """Encode given data to a Tektronix Extended Hex line.
 
            One or more Tektronix Extended Hex lines are encoded from the given address and buffer and written to the
-           given file handle.
+           given file handle. The last line holds the remaining bytes, down to a single one. The two digit checksum of
+           every line is the sum of all its hex digit values, excluding the checksum itself, modulo 256.
 
            Args:
              fh (file handle or compatible): Destination of Tektronix Extended Hex lines.
@@ -159,19 +187,20 @@ class TektronixExtHex(HexFormat):
         endaddress = address + len(buffer) - 1
         bytesperline = max(1, min(bytesperline, ((255 - 6 - addresslength) // 2)))
         length = 2 * bytesperline + addresslength + 6
+        data = buffer[offset:offset + len(buffer)]
+        datasums = checksum.nibbleblocksums(data, bytesperline)
         numdatarecords = 0
-        while address < endaddress or numdatarecords == 0:
+        while address <= endaddress or numdatarecords == 0:
             numdatarecords += 1
             if address + bytesperline > endaddress:
                 bytesperline = endaddress - address + 1
                 length = 2 * bytesperline + addresslength + 6
-            checksum = 0
-            line = "{0:02X}{1:1X}{2:1X}{3:0{2:d}X}{4:s}".format(
-                length, recordtype, addresslength, address,
-                binascii.hexlify(buffer[offset:offset + bytesperline]).upper().decode())
-            for char in line:
-                checksum += int(char, 16)
-            line = "%" + line[0:3] + "{:02X}".format(checksum) + line[3:] + "\n"
+            line = "{0:02X}{1:1X}{2:1X}{3:0{2:d}X}".format(length, recordtype, addresslength, address)
+            linesum = checksum.hexdigitsum(line)
+            if numdatarecords <= len(datasums):
+                linesum += datasums[numdatarecords - 1]
+            line += binascii.hexlify(buffer[offset:offset + bytesperline]).upper().decode()
+            line = "%" + line[0:3] + "{:02X}".format(linesum & 0xFF) + line[3:] + "\n"
             fh.write(line)
             offset += bytesperline
             address += bytesperline
@@ -200,7 +229,7 @@ class TektronixExtHex(HexFormat):
                 raise DecodeError("No valid Tektronix Extended Hex start code found.")
             length = int(line[1:3], 16)
             recordtype = int(line[3], 16)
-            checksum = int(line[4:6], 16)
+            recordchecksum = int(line[4:6], 16)
             addresslength = int(line[6], 16)
             datalength = ((length - addresslength - 6) // 2)
             beginofdata = 7 + addresslength
@@ -209,28 +238,30 @@ class TektronixExtHex(HexFormat):
                 data = bytearray.fromhex(line[beginofdata:])
             else:
                 data = bytearray()
-            verifychecksum = 0
-            for char in line[1:4] + line[6:length + 1]:
-                verifychecksum += int(char, 16)
-            checksumcorrect = (verifychecksum == checksum)
+            verifychecksum = checksum.hexdigitsum(line[1:4] + line[6:length + 1])
+            checksumcorrect = ((verifychecksum & 0xFF) == recordchecksum)
         except DecodeError:
             raise
         except:
             raise DecodeError("Misformatted Tektronix Extended Hex line.")
-        return recordtype, address, addresslength, data, datalength, checksum, checksumcorrect
+        return recordtype, address, addresslength, data, datalength, recordchecksum, checksumcorrect
 
     @classmethod
-    def fromtekfile(cls, filename):
+    def fromtekfile(cls, filename, workers=None):
         """Generates instance from Tektronix Extended Hex file.
 
-           Opens filename for reading and calls :meth:`fromtekfh` with the file handle.
+           Opens filename for reading and calls :meth:`fromtekfh` with the file handle. If <workers> is larger
+           than 1 the file is loaded in parallel instead, see :meth:`loadtekfile`.
 
            Args:
              filename (str): Name of Tektronix Extended Hex file.
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              New instance of class with loaded data.
         """
+        if workers is not None and workers > 1:
+            return cls().loadtekfile(filename, workers=workers)
         with open(filename, "r") as fh:
             return cls.fromtekfh(fh)
 
@@ -250,10 +281,16 @@ class TektronixExtHex(HexFormat):
         self.loadtekfh(fh)
         return self
 
-    def loadtekfile(self, filename, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True):
+    def loadtekfile(self, filename, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True,
+                    workers=None):
         """Loads Tektronix Extended Hex lines from named file.
 
-           Creates new instance and calls :meth:`loadtekfh` on it.
+           Opens filename for reading and calls :meth:`loadtekfh` with the file handle.
+
+           If <workers> is larger than 1 the file is split at line boundaries into chunks which are decoded in
+           parallel by that many worker processes, see :meth:`_loadparallel`. The data records of every chunk are
+           counted first, so that the metadata is taken from the first data record of the file like for sequential
+           loading.
 
            Args:
              filename (str): Name of Tektronix Extended Hex file.
@@ -261,10 +298,16 @@ class TektronixExtHex(HexFormat):
              overwrite_data (bool): If True existing data will be overwritten.
              raise_error_on_miscount (bool): If True a DecodeError is raised if the number of records read differs from
                                              stored number of records.
+             workers (None or int): Number of worker processes. If None or 1 the file is loaded sequentially.
 
            Returns:
              self
         """
+        if workers is not None and workers > 1:
+            return self._loadparallel(filename, workers, '_loadtekblocks',
+                                      (overwrite_metadata, overwrite_data, raise_error_on_miscount), _counttekdata,
+                                      (0,), lambda state, count: (state[0] + count,), overwrite_data,
+                                      overwrite_metadata, None if overwrite_metadata else self._emptycopy())
         with open(filename, "r") as fh:
             return self.loadtekfh(fh, overwrite_metadata, overwrite_data, raise_error_on_miscount)
 
@@ -289,9 +332,24 @@ class TektronixExtHex(HexFormat):
              DecodeError: If raise_error_on_miscount is True and number of records read differ from stored number of
                           records.
         """
-        line = fh.readline()
-        numdatarecords = 0
-        while line != '':
+        self._loadtekblocks(readlineblocks(fh), overwrite_metadata, overwrite_data, raise_error_on_miscount)
+        return self
+
+    def _loadtekblocks(self, blocks, overwrite_metadata=False, overwrite_data=True, raise_error_on_miscount=True,
+                       numdatarecords=0):
+        """Load blocks of Tektronix Extended Hex lines as yielded by :func:`hexformat.base.readlineblocks`.
+
+           Args:
+             blocks (iterable): Lists of Tektronix Extended Hex lines.
+             overwrite_metadata (bool): If True existing metadata will be overwritten.
+             overwrite_data (bool): If True existing data will be overwritten.
+             raise_error_on_miscount (bool): Not used, as the format does not store the number of records.
+             numdatarecords (int): Number of data records read before the first line.
+
+           Returns:
+             False, as the terminator record does not end the reading.
+        """
+        for line in itertools.chain.from_iterable(blocks):
             (recordtype, address, addresslength, data, datalength, checksum,
              checksumcorrect) = self.__class__._parsetekline(line)
             if recordtype == TYPE_DATA:
@@ -310,5 +368,11 @@ class TektronixExtHex(HexFormat):
                 pass
             else:
                 raise DecodeError("Unsupported record type: {:d}".format(recordtype))
-            line = fh.readline()
-        return self
+        return False
+
+    def _mergemetadata(self, other, overwrite_metadata=False):
+        """Take over the metadata of an instance loaded from a later part of the same file."""
+        for name in ('_bytesperline', '_addresslength', '_startaddress'):
+            value = getattr(other, name)
+            if value is not None and (overwrite_metadata or getattr(self, name) is None):
+                setattr(self, name, value)
@@ -110,6 +110,35 @@ class TestBase(TestCase):
         self.assertEqual(srec._parts, ihex._parts)
         self.assertIs(srec._parts[0][1], ihex._parts[0][1])
 
+    # noinspection PyProtectedMember
+    def test_fromother_copy_on_write(self):
+        srec = SRecord()
+        srec.set(0, bytearray.fromhex("0123456789"))
+        ihex = IntelHex.fromother(srec)
+        self.assertIs(srec._parts[0][1], ihex._parts[0][1])
+        ihex.set(1, bytearray(2))
+        self.assertEqual(srec.get(0, 5), bytearray.fromhex("0123456789"))
+        self.assertEqual(ihex.get(0, 5), bytearray.fromhex("0100006789"))
+
+    # noinspection PyProtectedMember
+    def test_fromother_shallow_offset(self):
+        ihex = IntelHex()
+        ihex.set(0x100, b'abcd')
+        ihex.set(0x200, b'efgh')
+        srec = SRecord.fromother(ihex, shallow_copy=True)
+        srec.offset(0x1000)
+        self.assertEqual(ihex.get(0x1100, 4), bytearray(b'abcd'))
+        ihex.set(0x1104, b'XY')
+        self.assertEqual(ihex.parts(), [(0x1100, 6), (0x1200, 4)])
+        self.assertEqual(ihex._starts, [0x1100, 0x1200])
+        srec.set(0x10FE, b'ZZ')
+        srec.fill(0x1100, 0x104, 0x00)
+        for image in (ihex, srec):
+            self.assertEqual(image.parts(), [(0x10FE, 0x106)])
+            self.assertEqual(image._starts, [0x10FE])
+            self.assertEqual(image.get(0x10FE, 8), bytearray(b'ZZabcdXY'))
+            self.assertEqual(image.get(0x1200, 4), bytearray(b'efgh'))
+
     def test_fromother_3(self):
         with self.assertRaises(TypeError):
             SRecord.fromother({0x100: 0xDE, 0x101: 0xAD, 0x102: 0xBE, 0x103: 0xEF, 0x200: 0xFF})
@@ -0,0 +1,105 @@
+""" Unit tests for checksum backends.
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import io
+import unittest
+
+from hexformat import checksum
+from hexformat.intelhex import IntelHex
+from hexformat.srecord import SRecord
+from hexformat.tektronix import TektronixExtHex
+from tests import TestCase, randbytes
+
+
+class TestChecksum(TestCase):
+
+    def setUp(self):
+        self.previous = checksum.backend
+
+    def tearDown(self):
+        checksum.setbackend(self.previous)
+
+    def test_python_backend(self):
+        backend = checksum.PythonChecksums
+        data = bytearray(range(0, 256))
+        self.assertEqual(backend.bytesums(data, [0, 10, 100]), [sum(data[0:10]), sum(data[10:100]), sum(data[100:])])
+        self.assertEqual(backend.bytesums(data, []), [])
+        self.assertEqual(backend.blocksums(data, 100), [sum(data[0:100]), sum(data[100:200]), sum(data[200:])])
+        self.assertEqual(backend.blocksums(bytearray(), 16), [])
+        self.assertEqual(backend.nibbleblocksums(bytearray(b'\x12\xAB\xFF'), 2), [1 + 2 + 10 + 11, 15 + 15])
+        self.assertEqual(backend.hexdigitsum("0aF1"), 0 + 10 + 15 + 1)
+        self.assertRaises(ValueError, backend.hexdigitsum, "0G")
+
+    @unittest.skipUnless(checksum.numpy, "NumPy not installed")
+    def test_numpy_backend(self):
+        python = checksum.PythonChecksums
+        numpy = checksum.NumpyChecksums
+        for size in (0, 1, 15, 16, 17, 1000):
+            data = bytearray(randbytes(size))
+            for blocksize in (1, 3, 16, 255):
+                self.assertEqual(numpy.blocksums(data, blocksize), python.blocksums(data, blocksize))
+                self.assertEqual(numpy.nibbleblocksums(data, blocksize), python.nibbleblocksums(data, blocksize))
+            starts = list(range(0, size, 7))
+            self.assertEqual(numpy.bytesums(data, starts), python.bytesums(data, starts))
+            self.assertEqual(numpy.bytesums(bytes(data), starts), python.bytesums(data, starts))
+
+    def test_bytesums_empty_records(self):
+        data = bytearray(b'\x01\x02\x03\x04\x05')
+        for backend in checksum.BACKENDS.values():
+            self.assertEqual(backend.bytesums(data, [0, 1, 1]), [1, 0, 2 + 3 + 4 + 5])
+            self.assertEqual(backend.bytesums(data, [0, 0, 4, 5]), [0, 1 + 2 + 3 + 4, 5, 0])
+            self.assertEqual(backend.bytesums(data, [5, 5]), [0, 0])
+            self.assertEqual(backend.bytesums(bytearray(), [0]), [0])
+
+    def test_hexdigitsum(self):
+        for backend in checksum.BACKENDS.values():
+            self.assertEqual(backend.hexdigitsum("0123456789abcdefABCDEF"), 2 * sum(range(16)) - sum(range(10)))
+            self.assertEqual(backend.hexdigitsum(""), 0)
+            self.assertEqual(backend.hexdigitsum(u"\u0663F"), 3 + 15)
+            for string in ("0G", "1 2", "-1", u"\u00e4"):
+                self.assertRaises(ValueError, backend.hexdigitsum, string)
+
+    def test_setbackend(self):
+        previous = checksum.setbackend('python')
+        self.assertIs(previous, self.previous)
+        self.assertIs(checksum.backend, checksum.PythonChecksums)
+        self.assertIs(checksum.setbackend(self.previous), checksum.PythonChecksums)
+        self.assertRaises(ValueError, checksum.setbackend, 'unknown')
+        self.assertIs(checksum.backend, self.previous)
+
+    def test_encoding_identical(self):
+        data = bytearray(randbytes(3000))
+        outputs = {}
+        for name in checksum.BACKENDS:
+            checksum.setbackend(name)
+            for cls in (IntelHex, SRecord, TektronixExtHex):
+                instance = cls()
+                instance.set(0x1234, data)
+                instance.set(0xFFF0, data[0:33])
+                fh = io.StringIO()
+                instance.tofh(fh, bytesperline=17)
+                outputs.setdefault(cls, set()).add(fh.getvalue())
+                self.assertEqual(cls.fromfh(io.StringIO(fh.getvalue())).parts(), instance.parts())
+        for output in outputs.values():
+            self.assertEqual(len(output), 1)
@@ -22,9 +22,13 @@
     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
+import copy
+import pickle
+
 from tests import TestCase, randint, randbytes
 
-from hexformat.fillpattern import FillPattern
+from hexformat import fillpattern
+from hexformat.fillpattern import FillPattern, repeatpattern
 
 
 class TestFillpattern(TestCase):
@@ -110,6 +114,12 @@ class TestFillpattern(TestCase):
         fp = FillPattern.frompattern(testbytes)
         self.assertEqual(bytearray(fp), bytearray(testbytes))
 
+    def test_iszero(self):
+        self.assertTrue(FillPattern(0x00).iszero())
+        self.assertTrue(FillPattern((0, 0, 0), 100).iszero())
+        self.assertFalse(FillPattern().iszero())
+        self.assertFalse(FillPattern((0, 0, 1)).iszero())
+
     def test_setlength(self):
         fp = FillPattern()
         for n in range(1, 1500):
@@ -138,6 +148,42 @@ class TestFillpattern(TestCase):
         fp3 = fp2[10:]
         self.assertEqual(bytearray((b for b in fp3)), testdata[20:])
 
+    def test_tobytes(self):
+        testdata = randbytes(7)
+        fp = FillPattern(testdata, 100)
+        self.assertEqual(fp.tobytes(), bytearray(fp))
+        self.assertEqual(fp.tobytes(10, 1000), bytearray(fp[10:1010]))
+        self.assertEqual(fp[3:].tobytes(5, 20), bytearray(fp[8:28]))
+        self.assertEqual(fp.tobytes(0, 0), bytearray())
+        self.assertEqual(fp.tobytes(200), bytearray())
+        self.assertIsInstance(fp.tobytes(), bytearray)
+
+    def test_repeatpattern_cache(self):
+        pattern = randbytes(5)
+        view = repeatpattern(pattern, 1000)
+        self.assertGreaterEqual(len(view), 1000)
+        self.assertEqual(len(view) % 5, 0)
+        self.assertEqual(bytes(view[0:10]), bytes(pattern * 2))
+        self.assertIs(repeatpattern(pattern, 100).obj, view.obj)
+        self.assertIsNot(repeatpattern(pattern, 2000).obj, view.obj)
+        for n in range(0, fillpattern.FILLCACHE_ENTRIES + 1):
+            repeatpattern(bytes((n, 0xA5, 0x5A)), 10)
+        self.assertLessEqual(len(fillpattern._fillcache), fillpattern.FILLCACHE_ENTRIES)
+        self.assertNotIn(bytes(pattern), fillpattern._fillcache)
+        repeatpattern(pattern, fillpattern.FILLCACHE_MAXSIZE + 1)
+        self.assertNotIn(bytes(pattern), fillpattern._fillcache)
+
+    def test_slice_shares_pattern(self):
+        fp = FillPattern(randbytes(16), 1000)
+        fp2 = fp[5:500]
+        self.assertIs(fp2._pattern, fp._pattern)
+        self.assertIs(FillPattern.frompattern(fp)._pattern, fp._pattern)
+        self.assertIs(copy.deepcopy(fp)._pattern, fp._pattern)
+        self.assertFalse(hasattr(fp, '__dict__'))
+        fp3 = pickle.loads(pickle.dumps(fp2))
+        self.assertEqual(len(fp3), len(fp2))
+        self.assertEqual(bytearray(fp3), bytearray(fp2))
+
     def test_mul_error_1(self):
         with self.assertRaises(ValueError):
             FillPattern() * -1
@@ -23,6 +23,7 @@
 
 """
 from hexformat.intelhex import IntelHex
+import io
 import sys
 from tests import TestCaseWithTempfile, patch, randbytes, randint, randdict
 
@@ -40,6 +41,11 @@ class FakeFileHandle(list):
             return ''
 
 
+class SmallReadFileHandle(io.StringIO):
+    def read(self, size=-1):
+        return super(SmallReadFileHandle, self).read(7)
+
+
 class TestIntelHex(TestCaseWithTempfile):
 
     # noinspection PyProtectedMember
@@ -760,3 +766,130 @@ class TestIntelHex(TestCaseWithTempfile):
         ih = IntelHex.fromfh(fh)
         yield self.assertListEqual, ih._parts, testih._parts
         yield self.assertEqual, ih, testih
+
+    def test_loadihexfh_blocks(self):
+        testdata = randbytes(0x1000)
+        ih = IntelHex().set(0x1FF00, testdata)
+        fh = io.StringIO()
+        ih.toihexfh(fh, bytesperline=13)
+        for fh2 in (io.StringIO(fh.getvalue()), SmallReadFileHandle(fh.getvalue())):
+            self.assertEqual(IntelHex.fromihexfh(fh2), ih)
+
+    def test_loadihexfh_blocks_checksum_error(self):
+        lines = ":08DEAD000123456789ABCDEFAD\n:08DEB5000123456789ABCDEFA4\n:08DEBD000123456789ABCDEF9D\n"
+        ih = IntelHex()
+        with self.assertRaises(DecodeError):
+            ih.loadihexfh(io.StringIO(lines))
+        self.assertListEqual(ih.parts(), [(0xDEAD, 8)])
+        ih = IntelHex().loadihexfh(io.StringIO(lines), ignore_checksum_errors=True)
+        self.assertListEqual(ih.parts(), [(0xDEAD, 24)])
+
+    def test_loadihexfh_blocks_misformatted(self):
+        lines = ":08DEAD000123456789ABCDEFAD\n:08DEB50001234567 89ABCDEFA5\n08DEBD000123456789ABCDEF9D\n"
+        ih = IntelHex()
+        with self.assertRaises(ValueError):
+            ih.loadihexfh(io.StringIO(lines))
+        self.assertListEqual(ih.parts(), [(0xDEAD, 16)])
+
+    def test_loadihexfile_parallel(self):
+        ih = IntelHex(bytesperline=8)
+        ih.set(0x0, randbytes(0x100))
+        ih.set(0x1FFF0, randbytes(0x400))
+        ih.set(0x12340000, randbytes(0x300))
+        ih.eip = 0x12345678
+        ih.toihexfile(self.testfilename)
+        with open(self.testfilename, "a") as fh:
+            # Data after the end of file record is ignored
+            fh.write(":0400000512345678E3\n:0200000400FFFB\n:04000000DEADBEEFC4\n")
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x200):
+            ih1 = IntelHex.fromihexfile(self.testfilename)
+            ih2 = IntelHex.fromihexfile(self.testfilename, workers=2)
+        self.assertEqual(ih1, ih)
+        self.assertEqual(ih2, ih)
+        self.assertEqual(ih2.parts(), ih.parts())
+        self.assertEqual((ih2.bytesperline, ih2.variant, ih2.eip), (8, 32, 0x12345678))
+
+    def test_loadihexfile_parallel_segments(self):
+        ih = IntelHex(variant=16)
+        ih.set(0x0, randbytes(0x200))
+        ih.set(0x1FFF8, randbytes(0x800))
+        ih.set(0x31000, randbytes(0x800))
+        ih.toihexfile(self.testfilename)
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x400):
+            ih2 = IntelHex().set(0x100, bytearray(0x100)).loadihexfile(self.testfilename, workers=3)
+        self.assertEqual(ih2, ih)
+        self.assertEqual(ih2.variant, 16)
+
+    def test_loadihexfile_parallel_error(self):
+        ih = IntelHex().set(0x1000, randbytes(0x800))
+        ih.toihexfile(self.testfilename)
+        with open(self.testfilename, "r") as fh:
+            lines = fh.readlines()
+        lines[100] = lines[100][:-3] + "00\n"
+        with open(self.testfilename, "w") as fh:
+            fh.writelines(lines)
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x200):
+            ih1 = IntelHex()
+            with self.assertRaises(DecodeError):
+                ih1.loadihexfile(self.testfilename)
+            ih2 = IntelHex()
+            with self.assertRaises(DecodeError):
+                ih2.loadihexfile(self.testfilename, workers=2)
+        self.assertEqual(ih1.parts(), [(0x1000, 100 * 16)])
+        self.assertEqual(ih2, ih1)
+
+    def test_toihexfh_parallel(self):
+        ih = IntelHex(cs_ip=0x12345678, eip=0x9ABCDEF0)
+        ih.set(0x0, randbytes(0x100))
+        ih.set(0xFFC5, randbytes(0x200))
+        ih.set(0x2FFF0, randbytes(0x20))
+        ih.set(0xE0000, randbytes(0x1FF00))
+        for variant, bytesperline in ((32, 16), (16, 16), (16, 7)):
+            fh1 = io.StringIO()
+            fh2 = io.StringIO()
+            with patch('hexformat.intelhex.ENCODE_CHUNKSIZE', 0x100):
+                ih.toihexfh(fh1, variant=variant, bytesperline=bytesperline)
+                ih.toihexfh(fh2, workers=2, variant=variant, bytesperline=bytesperline)
+            self.assertEqual(fh2.getvalue(), fh1.getvalue())
+            self.assertGreater(fh2.getvalue().count(":02000004" if variant == 32 else ":02000002"), 2)
+
+    def test_toihexfh_parallel_error(self):
+        ih = IntelHex().set(0xFF00, randbytes(0x200))
+        fh1 = io.StringIO()
+        fh2 = io.StringIO()
+        with patch('hexformat.intelhex.ENCODE_CHUNKSIZE', 0x80):
+            with self.assertRaises(EncodeError):
+                ih.toihexfh(fh1, variant=8)
+            with self.assertRaises(EncodeError):
+                ih.toihexfh(fh2, workers=2, variant=8)
+        self.assertEqual(fh2.getvalue(), fh1.getvalue())
+        self.assertEqual(fh1.getvalue().count("\n"), 0x100 // 16)
+
+    # noinspection PyProtectedMember
+    def test_nextaddresshigh(self):
+        ih = IntelHex()
+        for variant in (16, 32):
+            for addresshigh, address, size, bytesperline in ((0x0, 0x0, 0x100, 16), (0x0, 0xFFF9, 0x20000, 7),
+                                                             (0x0, 0x1FFF0, 0x10, 16), (0x10000, 0x12345, 0x54321, 255),
+                                                             (0xE0000, 0xFFFF0, 0x10, 1)):
+                if variant == 32:
+                    addresshigh &= 0xFFFF0000
+                expected = ih._encodeihexchunk(io.StringIO(), bytearray(size), address, bytesperline, variant,
+                                               addresshigh)
+                self.assertEqual(IntelHex._nextaddresshigh(addresshigh, address, size, bytesperline, variant),
+                                 expected)
+
+    # noinspection PyProtectedMember
+    def test_toihexfh_records(self):
+        testdata = randbytes(0x38)
+        ih = IntelHex().set(0x1FFF0, testdata)
+        testlist = [ih._encodeihexline(4, 0, [0x00, 0x01]), ih._encodeihexline(0, 0xFFF0, testdata[0:0x10]),
+                    ih._encodeihexline(4, 0, [0x00, 0x02]), ih._encodeihexline(0, 0x0000, testdata[0x10:0x20]),
+                    ih._encodeihexline(0, 0x0010, testdata[0x20:0x30]), ih._encodeihexline(0, 0x0020, testdata[0x30:]),
+                    ":00000001FF\n"]
+        fh = FakeFileHandle()
+        ih.toihexfh(fh, bytesperline=16)
+        self.assertListEqual(fh, testlist)
+        fh = io.StringIO()
+        ih.toihexfh(fh, bytesperline=16)
+        self.assertEqual(fh.getvalue(), "".join(testlist))
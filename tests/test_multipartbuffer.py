@@ -23,11 +23,14 @@
 
 """
 
+import pickle
 import sys
+from random import randint
 from hexformat.fillpattern import RandomContent
 from hexformat.intelhex import IntelHex
 from hexformat.multipartbuffer import MultiPartBuffer
-from tests import TestCaseWithTempfile, randbytes
+from hexformat.pagedbuffer import PagedBuffer
+from tests import TestCaseWithTempfile, patch, randbytes
 
 sys.path.append('..')
 
@@ -213,6 +216,18 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         mp.crop(None)
         self.assertSequenceEqual(mp.get(None, None), testdata[20:-10])
 
+    # noinspection PyProtectedMember
+    def test_crop_empty(self):
+        for address, size in ((0x12, 0), (0x12, -3), (0x16, 0xA), (0x8, 0x8), (0x18, 0x4)):
+            mp = MultiPartBuffer().set(0x10, bytearray(b'abcdef')).set(0x20, bytearray(b'xy'))
+            mp.crop(address, size)
+            self.assertListEqual(mp._parts, [])
+            self.assertListEqual(mp._starts, [])
+            self.assertEqual(mp, MultiPartBuffer())
+        mp = MultiPartBuffer().set(0x10, bytearray(b'abcdef')).set(0x20, bytearray(b'xy'))
+        mp.crop(0x15, 0xC)
+        self.assertListEqual(mp.parts(), [(0x15, 1), (0x20, 1)])
+
     def test_extract(self):
         testdata = randbytes(100)
         mp = MultiPartBuffer()
@@ -224,6 +239,38 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         self.assertSequenceEqual(mp.get(None, None), testdata[0:20])
         self.assertSequenceEqual(mp3.get(None, None), testdata[20:])
 
+    # noinspection PyProtectedMember
+    def test_extract_shares_parts(self):
+        testdata = randbytes(0x100)
+        mp = MultiPartBuffer().set(0x100, testdata).set(0x300, testdata).set(0x500, testdata)
+        buffers = [buffer for address, buffer in mp._parts]
+        mp2 = mp.extract(0x180, 0x400)
+        self.assertEqual(mp2.parts(), [(0x180, 0x80), (0x300, 0x100), (0x500, 0x80)])
+        self.assertIs(mp2._parts[1][1], buffers[1])
+        mp2.set(0x300, bytearray(0x10))
+        self.assertSequenceEqual(mp.get(0x300, 0x100), testdata)
+        mp3 = mp.extract(0x200, 0x380, False)
+        self.assertIs(mp3._parts[0][1], buffers[1])
+        self.assertEqual(mp.parts(), [(0x100, 0x100), (0x580, 0x80)])
+        self.assertIs(mp._parts[1][1], buffers[2])
+        self.assertSequenceEqual(mp3.get(0x300, 0x100), testdata)
+
+    # noinspection PyProtectedMember
+    def test_delete_in_place(self):
+        testdata = randbytes(0x100)
+        mp = MultiPartBuffer()
+        for address in range(0x1000, 0x2000, 0x200):
+            mp.set(address, testdata)
+        buffers = [buffer for address, buffer in mp._parts]
+        mp.delete(0x1080, 0xB80)
+        self.assertEqual(mp.parts(), [(0x1000, 0x80), (0x1C00, 0x100), (0x1E00, 0x100)])
+        self.assertIs(mp._parts[0][1], buffers[0])
+        self.assertEqual(mp._starts, [0x1000, 0x1C00, 0x1E00])
+        mp.crop(0x1040, 0xE00)
+        self.assertEqual(mp.parts(), [(0x1040, 0x40), (0x1C00, 0x100), (0x1E00, 0x40)])
+        self.assertIs(mp._parts[2][1], buffers[7])
+        self.assertSequenceEqual(mp.get(0x1040, 0x40), testdata[0x40:0x80])
+
     def test_includesgaps(self):
         mp = MultiPartBuffer()
         mp.set(1000, bytearray(100))
@@ -403,6 +450,63 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         yield self.assertEqual, mp._parts, mp2._parts
         yield self.assertEqual, mp.__dict__, mp2.__dict__
 
+    def test_copy_on_write(self):
+        testdata = randbytes(0x100)
+        mp = MultiPartBuffer().set(0x100, testdata).set(0x1000, testdata)
+        mp2 = mp.copy()
+        self.assertIs(mp._parts[0][1], mp2._parts[0][1])
+        self.assertIsNot(mp._parts[0], mp2._parts[0])
+        mp2.set(0x110, bytearray(0x10))
+        mp2.offset(0x10)
+        self.assertIsNot(mp._parts[0][1], mp2._parts[0][1])
+        self.assertIs(mp._parts[1][1], mp2._parts[1][1])
+        self.assertEqual(mp.parts(), [(0x100, 0x100), (0x1000, 0x100)])
+        self.assertSequenceEqual(mp.get(0x100, 0x100), testdata)
+        mp.set(0x10FF, bytearray(1))
+        self.assertSequenceEqual(mp2.get(0x1010, 0x100), testdata)
+        mp.filter(lambda address, buffer, start, end: buffer.__setitem__(slice(start, end), bytearray(end - start)))
+        self.assertSequenceEqual(mp2.get(0x1010, 0x100), testdata)
+        self.assertSequenceEqual(mp.get(0x1000, 0x100), bytearray(0x100))
+
+    # noinspection PyProtectedMember
+    def test_set_descending(self):
+        testdata = randbytes(0x1000)
+        for pagesize in (None, 0x100):
+            mp = MultiPartBuffer().set(0x10, bytearray(4))
+            if pagesize is not None:
+                mp.usepages(pagesize)
+            with patch('hexformat.multipartbuffer.PREPEND_DEFER_SIZE', 0x100):
+                for address in range(0x1000 - 0x10, -0x10, -0x10):
+                    mp.set(0x100 + address, testdata[address:address + 0x10])
+            # Data in front of a bytearray part is collected and inserted when the parts are accessed
+            self.assertEqual(mp._partlist.pending is not None, pagesize is None)
+            if pagesize is None:
+                self.assertIs(type(mp._parts[1][1]), bytearray)
+            else:
+                self.assertIsInstance(mp._parts[1][1], PagedBuffer)
+            self.assertEqual(mp.parts(), [(0x10, 4), (0x100, 0x1000)])
+            self.assertSequenceEqual(mp.get(0x100, 0x1000), testdata)
+            mp.set(0x14, bytearray(0xEC))
+            self.assertEqual(mp.parts(), [(0x10, 0x10F0)])
+            self.assertSequenceEqual(mp.get(0x100, 0x1000), testdata)
+
+    # noinspection PyProtectedMember
+    def test_set_descending_shared(self):
+        testdata = randbytes(0x100)
+        mp1 = MultiPartBuffer().set(0x1000, bytearray(0x10))
+        mp2 = mp1.copy()
+        with patch('hexformat.multipartbuffer.PREPEND_DEFER_SIZE', 0x10):
+            for address in range(0x100 - 0x10, -0x10, -0x10):
+                mp1.set(0xF00 + address, testdata[address:address + 0x10])
+            mp3 = pickle.loads(pickle.dumps(mp1))
+            mp4 = mp1.copy()
+        for mp in (mp1, mp3, mp4):
+            self.assertIs(type(mp._parts[0][1]), bytearray)
+            self.assertEqual(mp.parts(), [(0xF00, 0x110)])
+            self.assertEqual(mp._starts, [0xF00])
+            self.assertSequenceEqual(mp.get(0xF00, 0x110), testdata + bytearray(0x10))
+        self.assertEqual(mp2.parts(), [(0x1000, 0x10)])
+
     # noinspection PyProtectedMember
     def test_loaddict(self):
         mp = MultiPartBuffer()
@@ -531,6 +635,88 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         self.assertIs(mp, ret)
         self.assertEqual(mp, mp2)
 
+    def test_unfill_over_gaps(self):
+        mp = MultiPartBuffer()
+        for address in range(0x100, 0x800, 0x100):
+            mp.set(address, filldata(0x40, 0xFF))
+        mp.set(0x740, filldata(0x80, 0x00))
+        mp.unfill(0x120, 0x700, unfillpattern=0xFF, mingapsize=0x10, unfillboundaries=False)
+        self.assertListEqual(mp.parts(), [(0x100, 0x20), (0x740, 0x80)])
+
+    def test_unfill_without_numpy(self):
+        data = bytearray(b'\x00\x01\x01\x01\x00\x01\x00') * 20
+        for unfillpattern in (0x01, b'\x01\x00', b'\x00\x01\x01'):
+            for mingapsize in (1, 3, 16):
+                mp = MultiPartBuffer().set(0x10, data).set(0x100, data)
+                mp.unfill(unfillpattern=unfillpattern, mingapsize=mingapsize)
+                with patch('hexformat.multipartbuffer.numpy', None):
+                    mp2 = MultiPartBuffer().set(0x10, data).set(0x100, data)
+                    mp2.unfill(unfillpattern=unfillpattern, mingapsize=mingapsize)
+                self.assertEqual(mp, mp2)
+                self.assertEqual(mp._starts, mp2._starts)
+
+    def test_blockunfill(self):
+        mp = MultiPartBuffer()
+        mp.set(0x100, filldata(0x300, 0xFF))
+        mp.set(0x180, bytearray(0x10))
+        mp.set(0x3F0, bytearray(0x20))
+        mp.blockunfill(0x80, unfillpattern=0xFF)
+        self.assertListEqual(mp.parts(), [(0x180, 0x80), (0x380, 0x90)])
+        mp = MultiPartBuffer()
+        mp.set(0x100, filldata(0x300, 0xFF))
+        mp.set(0x180, bytearray(0x10))
+        mp.blockunfill(0x80, unfillpattern=0xFF, mingapsize=0x20, unfillboundaries=True)
+        self.assertListEqual(mp.parts(), [(0x180, 0x10)])
+
+    def test_iterblocks(self):
+        mp = MultiPartBuffer()
+        mp.set(0x10, bytearray(0x10))
+        mp.set(0x100, filldata(0x110, 0x11))
+        mp.set(0xFFFFF000, filldata(0x10, 0x22))
+        blocks = list(mp.iterblocks(0x100))
+        self.assertListEqual([address for address, view in blocks], [0x0, 0x100, 0x200, 0xFFFFF000])
+        self.assertSequenceEqual(blocks[0][1], filldata(0x10) + bytearray(0x10) + filldata(0xE0))
+        self.assertSequenceEqual(blocks[1][1], filldata(0x100, 0x11))
+        self.assertSequenceEqual(blocks[2][1], filldata(0x10, 0x11) + filldata(0xF0))
+        self.assertSequenceEqual(blocks[3][1], filldata(0x10, 0x22) + filldata(0xF0))
+        self.assertListEqual([address for address, view in mp.iterblocks(0x100, 0x150, 0x100)], [0x100, 0x200])
+        self.assertListEqual([address for address, view in mp.iterblocks(0x1000, 0x2000, 0x1000)], [])
+        self.assertRaises(ValueError, list, mp.iterblocks(0))
+
+    def test_hasdata_touching(self):
+        mp = MultiPartBuffer()
+        self.assertFalse(mp.hasdata(0, 0x100))
+        mp.set(0x100, bytearray(0x10))
+        mp.set(0x118, bytearray(0x10))
+        # Changed in v0.5.0: A part starting at the end of the area does not count, earlier versions returned True
+        self.assertFalse(mp.hasdata(0xF0, 0x10))
+        self.assertListEqual(list(mp.iterblocks(0x10, 0xF0, 0x10)), [])
+        # Changed in v0.5.0: A part starting inside the area after a gap counts, earlier versions returned False
+        self.assertTrue(mp.hasdata(0x110, 0x10))
+        self.assertListEqual([address for address, view in mp.iterblocks(0x10, 0x110, 0x10)], [0x110])
+        self.assertFalse(mp.hasdata(0x110, 0x8))
+        self.assertFalse(mp.hasdata(0x128, 0x8))
+        self.assertTrue(mp.hasdata(0x100, 0))
+        self.assertTrue(mp.hasdata())
+        for blocksize in (0x4, 0x8, 0x10):
+            blocks = [address for address, view in mp.iterblocks(blocksize, 0xE0, 0x60)]
+            for address in range(0xE0, 0x140, blocksize):
+                self.assertEqual(mp.hasdata(address, blocksize), address in blocks)
+
+    def test_blockfilter_skipempty(self):
+        mp = MultiPartBuffer()
+        mp.set(0x0F0, bytearray(0x10))
+        mp.set(0x110, bytearray(0x10))
+        mp.set(0x80000000, bytearray(0x10))
+        addresses = []
+        mp.blockfilter(0x20, lambda inst, address, size: addresses.append(address), skipempty=True)
+        self.assertListEqual(addresses, [0x0E0, 0x100, 0x80000000])
+        addresses = []
+        mp.blockfilter(0x20, lambda inst, address, size: addresses.append(address), 0xE0, 0x60)
+        self.assertListEqual(addresses, [0x0E0, 0x100, 0x120])
+        mp.blockfill(0x20, fillpattern=0xFF)
+        self.assertListEqual(mp.parts(), [(0x0E0, 0x40), (0x80000000, 0x20)])
+
     def test_unfill_3(self):
         mp = MultiPartBuffer()
         fillpattern = bytearray.fromhex("A1") * 10
@@ -1001,6 +1187,47 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         with self.assertRaises(TypeError):
             mp.add(set(range(0, 10)))
 
+    def test_add_mp_sweep(self):
+        for overwrite in (True, False):
+            for _ in range(0, 50):
+                mp1 = MultiPartBuffer()
+                mp2 = MultiPartBuffer()
+                for _ in range(0, 10):
+                    mp1.set(randint(0, 0x200), randbytes(randint(1, 0x40)))
+                    mp2.set(randint(0, 0x200), randbytes(randint(1, 0x40)))
+                mpb = mp1.copy()
+                for address, buffer in mp2._parts:
+                    mpb.set(address, buffer, overwrite=overwrite)
+                ret = mp1.add(mp2, overwrite=overwrite)
+                self.assertIs(ret, mp1)
+                self.assertEqual(mp1, mpb)
+                self.assertEqual(mp1._starts, [address for address, buffer in mp1._parts])
+
+    def test_add_mp_keeps_buffers(self):
+        mp1 = MultiPartBuffer().set(0x00, randbytes(0x10)).set(0x100, randbytes(0x10))
+        mp2 = MultiPartBuffer().set(0x80, randbytes(0x10))
+        buffers = [buffer for address, buffer in mp1._parts]
+        mp1.add(mp2)
+        self.assertEqual(mp1.parts(), [(0x00, 0x10), (0x80, 0x10), (0x100, 0x10)])
+        self.assertIs(mp1._parts[0][1], buffers[0])
+        self.assertIs(mp1._parts[2][1], buffers[1])
+        self.assertIsNot(mp1._parts[1][1], mp2._parts[0][1])
+
+    def test_merge_all(self):
+        testdata1 = randbytes(0x100)
+        testdata2 = randbytes(0x100)
+        testdata3 = randbytes(0x10)
+        images = [MultiPartBuffer().set(0x00, testdata1), MultiPartBuffer().set(0x80, testdata2),
+                  {0x1000 + n: byte for n, byte in enumerate(testdata3)}]
+        mp = MultiPartBuffer.merge_all(images)
+        self.assertIsInstance(mp, MultiPartBuffer)
+        self.assertEqual(mp, MultiPartBuffer().set(0x00, testdata1).set(0x80, testdata2).set(0x1000, testdata3))
+        mp = MultiPartBuffer.merge_all(images, overwrite=False)
+        self.assertEqual(mp, MultiPartBuffer().set(0x00, testdata1).set(0x80, testdata2, overwrite=False)
+                         .set(0x1000, testdata3))
+        self.assertEqual(IntelHex.merge_all(images).__class__, IntelHex)
+        self.assertEqual(MultiPartBuffer.merge_all([]).parts(), [])
+
     def test_fillfront_0(self):
         testdata = randbytes(0x100)
         mp = MultiPartBuffer().set(0x20, testdata)
@@ -1072,6 +1299,78 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         self.assertEqual(mp.end(), 0x100)
         self.assertSequenceEqual(mp.get(None, None), (bytearray.fromhex("2E" * 0x100)))
 
+    def test_fillgaps(self):
+        testdata = randbytes(0x10)
+        mp = MultiPartBuffer()
+        for address in range(0x100, 0x200, 0x20):
+            mp.set(address, testdata)
+        ret = mp.fillgaps([0x01, 0x02, 0x03])
+        self.assertIs(mp, ret)
+        self.assertEqual(mp.parts(), [(0x100, 0xF0)])
+        self.assertSequenceEqual(mp.get(0x100, 0x30), testdata + bytearray([0x01, 0x02, 0x03] * 5 + [0x01]) + testdata)
+        mp.fillgaps(MyExept)
+        self.assertRaises(MyExept, mp.set(0x300, testdata).fillgaps, MyExept)
+
+    # noinspection PyProtectedMember
+    def test_fillgaps_paged(self):
+        mp1 = MultiPartBuffer().usepages(0x100)
+        mp1.set(0x80, randbytes(0x180)).set(0x2F0, randbytes(0x400)).set(0x800, randbytes(0x10))
+        mp2 = MultiPartBuffer().add(mp1)
+        page = mp1._parts[1][1]._pages[1]
+        mp1.fillgaps([0x01, 0x02, 0x03])
+        mp2.fillgaps([0x01, 0x02, 0x03])
+        self.assertEqual(mp1.parts(), [(0x80, 0x790)])
+        self.assertIsInstance(mp1._parts[0][1], PagedBuffer)
+        self.assertTrue(any(p is page for p in mp1._parts[0][1]._pages))
+        self.assertSequenceEqual(mp1.get(None, None), mp2.get(None, None))
+        # Pages of shared parts are copied
+        mp3 = MultiPartBuffer().usepages(0x100).set(0x80, randbytes(0x180)).set(0x2F0, randbytes(0x400))
+        mp4 = mp3.copy()
+        mp3.fillgaps(0xFF)
+        self.assertEqual(mp3.parts(), [(0x80, 0x670)])
+        self.assertEqual(mp4.parts(), [(0x80, 0x180), (0x2F0, 0x400)])
+        self.assertSequenceEqual(mp3.get(0x2F0, 0x400), mp4.get(0x2F0, 0x400))
+
+    def test_fill_random(self):
+        mp = MultiPartBuffer().set(0x100, bytearray(0x10))
+        mp.fill(0, 0x10000, RandomContent)
+        self.assertListEqual(mp.parts(), [(0, 0x10000)])
+        self.assertSequenceEqual(mp.get(0x100, 0x10), bytearray(0x10))
+        mp1 = MultiPartBuffer().set(0x100, bytearray(0x10)).set(0x200, bytearray(0x10))
+        mp2 = mp1.copy()
+        mp1.fill(0x110, 0xF0, fillpattern=RandomContent(seed='abc'))
+        mp2.fillgaps(RandomContent(seed='abc'))
+        self.assertEqual(mp1, mp2)
+        self.assertSequenceEqual(mp1.get(0x110, 0xF0), RandomContent(0xF0, seed='abc').tobytes())
+
+    def test_fill_many_gaps(self):
+        mp = MultiPartBuffer()
+        for address in range(0, 0x10000, 0x10):
+            mp.set(address, bytearray(8))
+        mp2 = mp.copy()
+        mp.fill(fillpattern=0xFF)
+        mp2.fillgaps(0xFF)
+        self.assertEqual(mp.parts(), [(0, 0xFFF8)])
+        self.assertEqual(mp, mp2)
+        self.assertSequenceEqual(mp.get(0x10, 0x10), bytearray(8) + filldata(8, 0xFF))
+
+    def test_loadbinfile_mmap(self):
+        testdata = randbytes(1024)
+        with open(self.testfilename, "wb") as fh:
+            fh.write(testdata)
+        for kwargs in ({}, {'address': 0x100}, {'address': 0x1000, 'size': 512}, {'offset': 100},
+                       {'offset': -24, 'size': 100}, {'offset': 2000}):
+            mp1 = MultiPartBuffer().loadbinfile(self.testfilename, **kwargs)
+            mp2 = MultiPartBuffer().loadbinfile(self.testfilename, usemmap=True, **kwargs)
+            self.assertEqual(mp1, mp2)
+        mp = MultiPartBuffer().set(0x80, bytearray(0x100))
+        mp.loadbinfile(self.testfilename, address=0x100, usemmap=True)
+        self.assertEqual(mp.parts(), [(0x80, 0x480)])
+        self.assertSequenceEqual(mp.get(0x80, 0x80), bytearray(0x80))
+        self.assertSequenceEqual(mp.get(0x100, None), testdata)
+        mp = MultiPartBuffer.frombinfile(self.testfilename, address=0x100, usemmap=True)
+        self.assertEqual(mp.parts(), [(0x100, 1024)])
+
     def test_todict(self):
         testdata = randbytes(100)
         mp = MultiPartBuffer().set(1000, testdata)
@@ -1079,6 +1378,37 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         d2 = mp.todict()
         self.assertEqual(d1, d2)
 
+    def test_loaddict_runs(self):
+        testdata = randbytes(0x100)
+        d = {n: b for n, b in enumerate(testdata, 0x1000)}
+        d.update({n: 0x11 for n in range(0x80, 0x90)})
+        d[0x2000] = 0x22
+        mp = MultiPartBuffer().loaddict(d)
+        self.assertListEqual(mp.parts(), [(0x80, 0x10), (0x1000, 0x100), (0x2000, 1)])
+        self.assertSequenceEqual(mp.get(0x1000, 0x100), testdata)
+        self.assertEqual(mp.todict(), d)
+        mp.loaddict({0x7F: 0x33, 0x80: 0x44, 0x2001: 0x55}, overwrite=False)
+        self.assertListEqual(mp.parts(), [(0x7F, 0x11), (0x1000, 0x100), (0x2000, 2)])
+        self.assertSequenceEqual(mp.get(0x7F, 3), bytearray((0x33, 0x11, 0x11)))
+        self.assertRaises(ValueError, MultiPartBuffer().loaddict, {0: 0x100})
+
+    def test_dictview(self):
+        testdata = randbytes(0x20)
+        mp = MultiPartBuffer().set(0x100, testdata).set(0x200, testdata)
+        view = mp.dictview()
+        self.assertEqual(len(view), 0x40)
+        self.assertEqual(view[0x100], testdata[0])
+        self.assertEqual(view[0x21F], testdata[0x1F])
+        self.assertNotIn(0xFF, view)
+        self.assertNotIn(0x120, view)
+        self.assertNotIn('x', view)
+        self.assertRaises(KeyError, view.__getitem__, 0x300)
+        self.assertEqual(dict(view), mp.todict())
+        self.assertEqual(view.get(0x50, 0xFF), 0xFF)
+        mp.set(0x50, b'\x01')
+        self.assertEqual(view[0x50], 0x01)
+        self.assertEqual(len(view), 0x41)
+
     def test_tobinfile_1(self):
         testdata = randbytes(1024)
         mp = MultiPartBuffer().set(100, testdata)
@@ -1133,6 +1463,40 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
             readdata = fh.read()
         self.assertSequenceEqual(bytearray(), readdata)
 
+    def test_tobinfile_stream(self):
+        mp = MultiPartBuffer()
+        mp.set(10, randbytes(30))
+        mp.set(100, randbytes(50))
+        mp.set(153, randbytes(1))
+        for fillpattern in (None, 0x00, [1, 2, 3, 4, 5]):
+            for address, size in ((None, None), (0, 200), (20, 100), (120, 10)):
+                with patch('hexformat.multipartbuffer.WRITE_CHUNKSIZE', 7):
+                    mp.tobinfile(self.testfilename, address, size, fillpattern)
+                with open(self.testfilename, "rb") as fh:
+                    readdata = fh.read()
+                start = mp.start() if address is None else address
+                length = mp.end() - start if size is None else size
+                self.assertSequenceEqual(readdata, mp.get(start, length, fillpattern))
+        self.assertRaises(MyExept, mp.tobinfile, self.testfilename, fillpattern=MyExept)
+        mp.tobinfile(self.testfilename, 100, 50, fillpattern=MyExept)
+
+    def test_tobinfile_sparse(self):
+        mp = MultiPartBuffer()
+        mp.set(0x1000, randbytes(30))
+        mp.set(0x30000, randbytes(50))
+        for address, size in ((None, None), (0, 0x40000), (0x1010, 0x30000)):
+            mp.tobinfile(self.testfilename, address, size, 0x00)
+            with open(self.testfilename, "rb") as fh:
+                expected = fh.read()
+            ret = mp.tobinfile(self.testfilename, address, size, 0x00, sparse=True)
+            self.assertIs(ret, mp)
+            with open(self.testfilename, "rb") as fh:
+                self.assertEqual(fh.read(), expected)
+        # Non-zero fill pattern is written normally
+        mp.tobinfile(self.testfilename, 0, 0x40000, [0, 1], sparse=True)
+        with open(self.testfilename, "rb") as fh:
+            self.assertEqual(fh.read(), mp.get(0, 0x40000, [0, 1]))
+
     def test_tobinfh_1(self):
         testdata = randbytes(1024)
         mp = MultiPartBuffer().set(100, testdata)
@@ -1370,3 +1734,89 @@ class TestMultiPartBuffer(TestCaseWithTempfile):
         with open(self.testfilename, "rb") as fh:
             readdata = fh.read()
         self.assertSequenceEqual(readdata, testdata)
+
+    # noinspection PyProtectedMember
+    def test_starts_index(self):
+        mp = MultiPartBuffer()
+        for address in range(0x10000, 0, -0x100):
+            mp.set(address, bytearray(0x10))
+        mp.set(0x500, bytearray(0x200))
+        mp.delete(0x1008, 0x100)
+        mp.offset(0x10)
+        self.assertListEqual(mp._starts, [address for address, buffer in mp._parts])
+        self.assertListEqual(mp._starts, sorted(mp._starts))
+
+    # noinspection PyProtectedMember
+    def test_find_scattered(self):
+        mp = MultiPartBuffer()
+        for address in range(0x1000, 0x100000, 0x1000):
+            mp.set(address, bytearray(0x10))
+        self.assertEqual(mp._find(0x0, 0x10, create=False), (0, 1))
+        self.assertEqual(mp._find(0x0, 0x1000, create=False), (0, 0))
+        self.assertEqual(mp._find(0x5008, 0x10, create=False), (4, 0))
+        self.assertEqual(mp._find(0x5010, 0x10, create=False), (4, 0))
+        self.assertEqual(mp._find(0x5011, 0x10, create=False), (5, 1))
+        self.assertEqual(mp._find(0x100000, 0x10, create=False), (254, -1))
+        self.assertEqual(mp._find(0x5800, 0x10, create=True), (5, 0))
+        self.assertListEqual(mp.parts()[4:7], [(0x5000, 0x10), (0x5800, 0x0), (0x6000, 0x10)])
+
+    # noinspection PyProtectedMember
+    def test_set_sequential(self):
+        testdata = randbytes(0x400)
+        mp = MultiPartBuffer()
+        mp.set(0x2000, bytearray(0x10))
+        for pos in range(0, 0x400, 0x10):
+            mp.set(0x1000 + pos, testdata[pos:pos + 0x10])
+        self.assertListEqual(mp._parts, [[0x1000, bytearray(testdata)], [0x2000, bytearray(0x10)]])
+        self.assertIs(mp._cursor[1], mp._parts[0])
+        mp.set(0x1400, bytearray(0xC00))  # reaches next part and must merge
+        self.assertListEqual(mp.parts(), [(0x1000, 0x1010)])
+        mp.delete(0x1000, 0x10)
+        mp.set(0x2010, bytearray(0x10))
+        self.assertListEqual(mp.parts(), [(0x1010, 0x1010)])
+        self.assertListEqual(mp._starts, [0x1010])
+
+    def test_get_manyparts(self):
+        mp = MultiPartBuffer()
+        testdata = randbytes(4)
+        numparts = sys.getrecursionlimit() + 100
+        for n in range(0, numparts):
+            mp.set(0x10 * n + 0x8, testdata)
+        result = mp.get(0, 0x10 * numparts, (0xA0, 0xA1, 0xA2))
+        self.assertEqual(len(result), 0x10 * numparts)
+        pattern = bytearray((0xA0, 0xA1, 0xA2)) * 4
+        expected = pattern[0:8] + (testdata + pattern[0:12]) * (numparts - 1) + testdata + pattern[0:4]
+        self.assertSequenceEqual(result, expected)
+
+    def test_get_exception(self):
+        mp = MultiPartBuffer()
+        mp.set(0x100, bytearray(0x10))
+        mp.set(0x120, bytearray(0x10))
+        self.assertSequenceEqual(mp.get(0x104, 0x8, MyExept), bytearray(0x8))
+        with self.assertRaises(MyExept):
+            mp.get(0x104, 0x20, MyExept)
+
+    # noinspection PyProtectedMember
+    def test_view(self):
+        testdata = randbytes(0x100)
+        mp = MultiPartBuffer()
+        mp.set(0x100, testdata)
+        mp.set(0x300, testdata)
+        view = mp.view(0x110, 0x20)
+        self.assertSequenceEqual(view, testdata[0x10:0x30])
+        self.assertTrue(view.readonly)
+        self.assertIs(view.obj, mp._parts[0][1])
+        view.release()
+        self.assertSequenceEqual(mp.view(0x1F0, 0x20, 0xFF), testdata[0xF0:] + bytearray(b"\xFF" * 0x10))
+
+    def test_iterviews(self):
+        testdata = randbytes(0x100)
+        mp = MultiPartBuffer()
+        mp.set(0x100, testdata)
+        mp.set(0x300, testdata)
+        views = list(mp.iterviews(0x180, 0x200))
+        self.assertListEqual([(address, len(view)) for address, view in views], [(0x180, 0x80), (0x300, 0x80)])
+        self.assertSequenceEqual(views[0][1], testdata[0x80:])
+        self.assertSequenceEqual(views[1][1], testdata[:0x80])
+        self.assertListEqual(list(mp.iterviews(0x200, 0x100)), [])
+        self.assertEqual(len(list(mp.iterviews())), 2)
@@ -0,0 +1,166 @@
+""" Unit tests for the paged part storage.
+
+  License::
+
+    MIT License
+
+    Copyright (c) 2015-2023 by Martin Scharrer <martin.scharrer@web.de>
+
+    Permission is hereby granted, free of charge, to any person obtaining a copy of this software
+    and associated documentation files (the "Software"), to deal in the Software without
+    restriction, including without limitation the rights to use, copy, modify, merge, publish,
+    distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the
+    Software is furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all copies or
+    substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING
+    BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+    NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+    DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import io
+import random
+
+from hexformat.multipartbuffer import MultiPartBuffer
+from hexformat.pagedbuffer import PagedBuffer
+from hexformat.srecord import SRecord
+from tests import TestCase, randbytes
+
+
+class TestPagedBuffer(TestCase):
+
+    def test_init(self):
+        pb = PagedBuffer(b'0123456789', pagesize=4, head=2)
+        self.assertEqual(len(pb), 10)
+        self.assertEqual([bytes(page) for page in pb._pages], [b'01', b'2345', b'6789'])
+        self.assertEqual(pb[:], bytearray(b'0123456789'))
+        self.assertEqual(pb[3], ord('3'))
+        self.assertEqual(pb[-1], ord('9'))
+        self.assertRaises(IndexError, pb.__getitem__, 10)
+        self.assertRaises(ValueError, PagedBuffer, b'', 0)
+
+    def test_prepend(self):
+        pb = PagedBuffer(b'6789', pagesize=4, head=2)
+        pb.prepend(b'2345')
+        pb.prepend(b'01')
+        self.assertEqual(pb, b'0123456789')
+        self.assertEqual([bytes(page) for page in pb._pages], [b'0123', b'4567', b'89'])
+
+    def test_split_adopt(self):
+        pb = PagedBuffer(bytes(range(0, 100)), pagesize=8, head=3)
+        pages = pb._pages[5:]
+        tail = pb.split(37)
+        self.assertEqual(pb, bytes(range(0, 37)))
+        self.assertEqual(tail, bytes(range(37, 100)))
+        self.assertIs(tail._pages[0], pages[0])
+        pb.adopt(tail)
+        self.assertEqual(pb, bytes(range(0, 100)))
+        self.assertEqual(len(tail), 0)
+        self.assertIs(pb._pages[5], pages[0])
+        other = PagedBuffer(b'abc', pagesize=8, head=0)
+        pb.adopt(other)
+        self.assertEqual(pb, bytes(range(0, 100)) + b'abc')
+
+    def test_find(self):
+        pb = PagedBuffer(b'abcabcXYZabc', pagesize=2, head=1)
+        self.assertEqual(pb.find(b'XYZ'), 6)
+        self.assertEqual(pb.find(b'abc', 1), 3)
+        self.assertEqual(pb.find(b'abc', 4, 11), -1)
+        self.assertEqual(pb.index(b'cX'), 5)
+        self.assertRaises(ValueError, pb.index, b'XX')
+        self.assertTrue(pb.startswith(b'abcX', 3))
+        self.assertFalse(pb.startswith(b'abcX', 0))
+
+    def test_random_operations(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            pagesize = rng.choice((1, 3, 16))
+            pb = PagedBuffer(pagesize=pagesize, head=rng.randrange(0, pagesize))
+            ref = bytearray()
+            for _ in range(30):
+                start = rng.randrange(0, len(ref) + 1)
+                stop = rng.randrange(start, len(ref) + 1)
+                data = bytes(rng.randrange(0, 256) for _ in range(rng.randrange(0, 40)))
+                op = rng.randrange(0, 5)
+                if op == 0:
+                    pb.extend(data)
+                    ref.extend(data)
+                elif op == 1:
+                    pb.prepend(data)
+                    ref[0:0] = data
+                elif op == 2:
+                    pb[start:stop] = data
+                    ref[start:stop] = data
+                elif op == 3:
+                    del pb[start:stop]
+                    del ref[start:stop]
+                else:
+                    tail = pb.split(start)
+                    pb.adopt(tail)
+                self.assertEqual(len(pb), len(ref))
+                self.assertEqual(pb[:], ref)
+                self.assertEqual(pb[start:stop], ref[start:stop])
+
+
+class TestPagedMultiPartBuffer(TestCase):
+
+    def test_usepages(self):
+        testdata = randbytes(0x1000)
+        mp = MultiPartBuffer().set(0x10, testdata).set(0x2000, testdata)
+        mp.usepages(0x100)
+        self.assertTrue(all(isinstance(buffer, PagedBuffer) for address, buffer in mp._parts))
+        self.assertEqual(mp._parts[0][1]._head, 0x10)
+        self.assertSequenceEqual(mp.get(0x10, 0x1000), testdata)
+        mp.usepages(None)
+        self.assertTrue(all(type(buffer) is bytearray for address, buffer in mp._parts))
+        self.assertEqual(mp.parts(), [(0x10, 0x1000), (0x2000, 0x1000)])
+
+    def test_same_as_contiguous(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            mp = MultiPartBuffer()
+            pmp = MultiPartBuffer().usepages(rng.choice((1, 8, 64)))
+            for _ in range(30):
+                address = rng.randrange(0, 0x200)
+                size = rng.randrange(0, 0x40)
+                op = rng.randrange(0, 5)
+                if op == 0:
+                    data = randbytes(size)
+                    mp.set(address, data)
+                    pmp.set(address, data)
+                elif op == 1:
+                    mp.delete(address, size)
+                    pmp.delete(address, size)
+                elif op == 2:
+                    mp.fill(address, size, 0x00)
+                    pmp.fill(address, size, 0x00)
+                elif op == 3:
+                    mp.unfill(unfillpattern=0x00, mingapsize=4)
+                    pmp.unfill(unfillpattern=0x00, mingapsize=4)
+                else:
+                    other = MultiPartBuffer().set(address, randbytes(size))
+                    mp.add(other, False)
+                    pmp.add(other, False)
+                self.assertEqual(mp, pmp)
+                self.assertEqual(mp._starts, pmp._starts)
+            start, size = mp.range()
+            self.assertEqual(mp.get(start, size, 0xFF), pmp.get(start, size, 0xFF))
+
+    def test_copy_and_format(self):
+        testdata = randbytes(0x300)
+        mp = SRecord().set(0x100, testdata).usepages(0x40)
+        mp2 = mp.copy()
+        mp2.delete(0x180, 0x10)
+        self.assertSequenceEqual(mp.get(0x100, 0x300), testdata)
+        self.assertEqual(mp2.parts(), [(0x100, 0x80), (0x190, 0x270)])
+        fh = io.StringIO()
+        mp.tosrecfh(fh)
+        fh.seek(0)
+        self.assertEqual(SRecord.fromsrecfh(fh), mp)
+        mp3 = SRecord.fromother(mp)
+        self.assertEqual(mp3._pagesize, 0x40)
+        self.assertEqual(mp3, mp)
@@ -22,7 +22,7 @@
     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
-from hexformat.fillpattern import RandomContent
+from hexformat.fillpattern import RandomContent, RANDOM_BLOCKSIZE
 from tests import TestCase, patch, randint
 
 
@@ -80,3 +80,29 @@ class TestRandomContent(TestCase):
         fp = RandomContent()
         with self.assertRaises(ValueError):
             fp * 1.4
+
+    def test_iszero(self):
+        self.assertFalse(RandomContent(100).iszero())
+
+    def test_tobytes(self):
+        fp = RandomContent(100)
+        self.assertEqual(len(fp.tobytes()), 100)
+        self.assertEqual(len(fp.tobytes(10)), 90)
+        self.assertEqual(len(fp.tobytes(0, 0x10000)), 0x10000)
+        self.assertNotEqual(fp.tobytes(0, 64), fp.tobytes(0, 64))
+
+    def test_seed(self):
+        size = 3 * RANDOM_BLOCKSIZE
+        fp = RandomContent(size, seed=42)
+        data = fp.tobytes()
+        self.assertEqual(len(data), size)
+        self.assertEqual(data, RandomContent(size, seed=42).tobytes())
+        self.assertNotEqual(data, RandomContent(size, seed=43).tobytes())
+        self.assertEqual(data, bytearray(fp))
+        self.assertEqual(fp.tobytes(100, RANDOM_BLOCKSIZE), data[100:100 + RANDOM_BLOCKSIZE])
+        self.assertEqual(fp[100:].tobytes(0, 50), data[100:150])
+        self.assertEqual(bytearray(fp[RANDOM_BLOCKSIZE + 5:RANDOM_BLOCKSIZE + 20]),
+                         data[RANDOM_BLOCKSIZE + 5:RANDOM_BLOCKSIZE + 20])
+        self.assertEqual(fp[5], data[5])
+        self.assertEqual(fp[-1], data[-1])
+        self.assertEqual((fp * 2).tobytes(0, size), data)
@@ -25,6 +25,7 @@
 from tests import TestCaseWithTempfile, randbytes, randint, randdict, patch, skipunlessslow
 from hexformat.base import EncodeError, DecodeError
 from hexformat.srecord import SRecord
+import io
 import sys
 
 
@@ -617,3 +618,54 @@ class TestSRecord(TestCaseWithTempfile):
         srec = SRecord(startaddress=0xDEADBEEF)
         with self.assertRaises(DecodeError):
             srec.loadsrecfh(fh)
+
+    def test_loadsrecfile_parallel(self):
+        srec = SRecord(header=b'test', bytesperline=16, write_number_of_records=True, startaddress=0x1234)
+        srec.set(0x100, randbytes(0x300))
+        srec.set(0x100000, randbytes(0x500))
+        srec.tosrecfile(self.testfilename)
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x200):
+            srec1 = SRecord.fromsrecfile(self.testfilename)
+            srec2 = SRecord.fromsrecfile(self.testfilename, workers=2)
+            srec3 = SRecord(bytesperline=8).set(0x80, bytearray(0x100))
+            srec3.loadsrecfile(self.testfilename, overwrite_data=False, workers=3)
+        self.assertEqual(srec2, srec1)
+        self.assertEqual(srec2.parts(), srec.parts())
+        self.assertEqual((srec2.header, srec2.bytesperline, srec2.addresslength, srec2.write_number_of_records,
+                          srec2.startaddress), (srec1.header, 16, 3, True, 0x1234))
+        self.assertEqual(srec3.parts(), [(0x80, 0x380), (0x100000, 0x500)])
+        self.assertEqual(srec3.get(0x80, 0x100), bytearray(0x100))
+        self.assertEqual(srec3.bytesperline, 8)
+
+    def test_loadsrecfile_parallel_miscount(self):
+        srec = SRecord(write_number_of_records=True).set(0x100, randbytes(0x800))
+        srec.tosrecfile(self.testfilename)
+        with open(self.testfilename, "r") as fh:
+            lines = fh.readlines()
+        with open(self.testfilename, "w") as fh:
+            # Wrong number of records in the middle of the file
+            fh.writelines(lines[0:41] + ["S503000AF2\n"] + lines[41:])
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x200):
+            srec1 = SRecord()
+            with self.assertRaises(DecodeError):
+                srec1.loadsrecfile(self.testfilename)
+            srec2 = SRecord()
+            with self.assertRaises(DecodeError):
+                srec2.loadsrecfile(self.testfilename, workers=2)
+            srec3 = SRecord().loadsrecfile(self.testfilename, raise_error_on_miscount=False, workers=2)
+        self.assertEqual(srec2.parts(), srec1.parts())
+        self.assertEqual(srec2, srec1)
+        self.assertEqual(srec3, srec)
+
+    def test_tosrecfh_parallel(self):
+        srec = SRecord(header=b'test', write_number_of_records=True, startaddress=0x1234)
+        srec.set(0x100, randbytes(0x301))
+        srec.set(0x100000, randbytes(0x500))
+        for bytesperline in (16, 7):
+            fh1 = io.StringIO()
+            fh2 = io.StringIO()
+            with patch('hexformat.srecord.PARALLEL_ENCODESIZE', 0x100):
+                srec.tosrecfh(fh1, bytesperline=bytesperline)
+                srec.tosrecfh(fh2, workers=2, bytesperline=bytesperline)
+            self.assertEqual(fh2.getvalue(), fh1.getvalue())
+            self.assertEqual(SRecord.fromsrecfh(io.StringIO(fh2.getvalue())), srec)
@@ -22,10 +22,124 @@
     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
+import io
+
+from hexformat import tektronix
 from hexformat.tektronix import TektronixExtHex
-from tests import TestCase
+from tests import TestCase, TestCaseWithTempfile, patch, randbytes
 
 
 class TektronixExtHex(TestCase):
     def test(self):
         return TektronixExtHex()
+
+    def test_totekfh_last_byte(self):
+        tek = tektronix.TektronixExtHex()
+        tek.set(0x100, bytearray(range(0, 18)))
+        fh = io.StringIO()
+        tek.totekfh(fh, bytesperline=17)
+        self.assertEqual(len(fh.getvalue().splitlines()), 3)
+        self.assertEqual(tektronix.TektronixExtHex.fromtekfh(io.StringIO(fh.getvalue())).parts(), [(0x100, 18)])
+
+    def test_totekfh_checksum_modulo(self):
+        tek = tektronix.TektronixExtHex()
+        tek.set(0xFFFF, bytearray(b'\xFF' * 32))
+        fh = io.StringIO()
+        tek.totekfh(fh)
+        line = fh.getvalue().splitlines()[0]
+        self.assertEqual(len(line), 1 + int(line[1:3], 16))
+        record = tektronix.TektronixExtHex._parsetekline(line)
+        self.assertTrue(record[-1])
+
+    def test_totekfh_trailing_byte(self):
+        # A single byte after the last full line was not written
+        for size in (1, 2, 16, 17, 33, 47):
+            data = randbytes(size)
+            tek = tektronix.TektronixExtHex().set(0x100, data)
+            fh = io.StringIO()
+            tek.totekfh(fh, bytesperline=16)
+            lines = fh.getvalue().splitlines()
+            self.assertEqual(len(lines), (size + 15) // 16 + 1)
+            loaded = tektronix.TektronixExtHex.fromtekfh(io.StringIO(fh.getvalue()))
+            self.assertEqual(loaded.parts(), [(0x100, size)])
+            self.assertEqual(loaded.get(0x100, size), data)
+
+    def test_totekfh_checksum_two_digits(self):
+        # The sum of all hex digits of a line is reduced modulo 256 to give the two digit checksum
+        tek = tektronix.TektronixExtHex().set(0xFFFFFF, bytearray(b'\xFF' * 16))
+        fh = io.StringIO()
+        tek.totekfh(fh, bytesperline=16)
+        line = fh.getvalue().splitlines()[0]
+        self.assertEqual(line, "%2D65670FFFFFF" + "FF" * 16)
+        digitsum = sum(int(char, 16) for char in line[1:4] + line[6:])
+        self.assertGreater(digitsum, 0xFF)
+        self.assertEqual(int(line[4:6], 16), digitsum & 0xFF)
+        self.assertTrue(tektronix.TektronixExtHex._parsetekline(line)[-1])
+        self.assertFalse(tektronix.TektronixExtHex._parsetekline(line[:4] + "00" + line[6:])[-1])
+
+    def test_totekfh_default_settings(self):
+        # The defaults were named _STANDARD_* while HexFormat looks up _DEFAULT_*
+        tek = tektronix.TektronixExtHex().set(0x10, bytearray(range(40)))
+        fh = io.StringIO()
+        tek.totekfh(fh)
+        lines = fh.getvalue().splitlines()
+        self.assertEqual([line[7:9] for line in lines], ["10", "30", "00"])
+        self.assertEqual(len(lines[0]), 7 + 2 + 2 * 32)
+
+    def test_addresslength(self):
+        # Length of the address field in hex digits, which fits in one hex digit
+        tek = tektronix.TektronixExtHex()
+        for addresslength in range(1, 16):
+            tek.addresslength = addresslength
+            self.assertEqual(tek.addresslength, addresslength)
+        for addresslength in (0, 16, -1):
+            with self.assertRaises(ValueError):
+                tek.addresslength = addresslength
+        self.assertRaises(ValueError, tektronix.TektronixExtHex, addresslength=16)
+
+    def test_totekfh_addresslength(self):
+        for address, size, addresslength in ((0x1, 0x8, 1), (0x12345, 0x40, None), (0x12345, 0x40, 5),
+                                             (0xFFFFFFC0, 0x40, 8), (0x100, 0x40, 15)):
+            data = randbytes(size)
+            tek = tektronix.TektronixExtHex().set(address, data)
+            fh = io.StringIO()
+            tek.totekfh(fh, addresslength=addresslength, startaddress=address)
+            expected = addresslength or len("{:X}".format(address + len(data) - 1))
+            for line in fh.getvalue().splitlines():
+                self.assertEqual(int(line[6], 16), expected)
+            loaded = tektronix.TektronixExtHex.fromtekfh(io.StringIO(fh.getvalue()))
+            self.assertEqual(loaded.parts(), [(address, len(data))])
+            self.assertEqual(loaded.get(address, len(data)), data)
+            self.assertEqual(loaded.addresslength, expected)
+            self.assertEqual(loaded.startaddress, address)
+
+
+class TestTektronixExtHexParallel(TestCaseWithTempfile):
+    def test_loadtekfile_parallel(self):
+        tek = tektronix.TektronixExtHex(startaddress=0x100)
+        tek.set(0x100, randbytes(0x400))
+        tek.set(0x20000, randbytes(0x300))
+        tek.totekfile(self.testfilename, bytesperline=16)
+        with patch('hexformat.base.PARALLEL_CHUNKSIZE', 0x200):
+            tek1 = tektronix.TektronixExtHex.fromtekfile(self.testfilename)
+            tek2 = tektronix.TektronixExtHex.fromtekfile(self.testfilename, workers=2)
+            tek3 = tektronix.TektronixExtHex(bytesperline=8)
+            tek3.loadtekfile(self.testfilename, overwrite_metadata=True, workers=3)
+        self.assertEqual(tek2, tek1)
+        self.assertEqual(tek2.parts(), tek.parts())
+        self.assertEqual((tek2.bytesperline, tek2.addresslength, tek2.startaddress), (16, 5, 0x100))
+        self.assertEqual(tek3, tek)
+        self.assertEqual(tek3.bytesperline, 16)
+
+    def test_totekfh_parallel(self):
+        tek = tektronix.TektronixExtHex(startaddress=0x100)
+        tek.set(0x100, randbytes(0x401))
+        tek.set(0x20000, randbytes(0x300))
+        for bytesperline in (16, 7):
+            fh1 = io.StringIO()
+            fh2 = io.StringIO()
+            with patch('hexformat.tektronix.PARALLEL_ENCODESIZE', 0x100):
+                tek.totekfh(fh1, bytesperline=bytesperline)
+                tek.totekfh(fh2, workers=2, bytesperline=bytesperline)
+            self.assertEqual(fh2.getvalue(), fh1.getvalue())
+            self.assertEqual(tektronix.TektronixExtHex.fromtekfh(io.StringIO(fh2.getvalue())), tek)